@@ -154,6 +154,12 @@ async def get_hot_sectors():
     return sector_service.get_hot_sectors(limit=10)
 
 
+@router.get("/market/sectors/dashboard")
+async def get_sector_dashboard():
+    """同时获取热门行业板块与热门概念板块"""
+    return sector_service.get_dashboard(limit=10)
+
+
 @router.get("/index/{code}/history")
 async def get_index_history(code: str):
     """
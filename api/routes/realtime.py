@@ -193,6 +193,22 @@ async def get_stock_intraday(code: str):
         raise HTTPException(status_code=500, detail=f"获取分时数据失败: {e}")
 
 
+@router.post("/realtime/intraday/batch")
+async def get_intraday_batch(codes: List[str]):
+    """批量获取分时数据（最多20只）"""
+    try:
+        valid_codes = [c for c in codes[:20] if c and len(c) == 6 and c.isdigit()]
+        
+        if not valid_codes:
+            return {}
+        
+        data = realtime_service.get_intraday_batch(valid_codes)
+        return {code: item for code, item in data.items() if 'error' not in item}
+    except Exception as e:
+        logger.error(f"批量获取分时数据失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"批量获取分时数据失败: {e}")
+
+
 @router.get("/stock/{code}/history")
 def get_stock_history(code: str):
     """获取股票历史K线数据"""
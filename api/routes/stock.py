@@ -11,14 +11,14 @@ import pandas as pd
 from api.validators import validate_stock_code
 from utils.logger import get_logger
 from analyzers.stock_analyzer import StockAnalyzer
-from services.stock_list_service import StockListService
+from services.stock_list_service import get_stock_list_service
 
 logger = get_logger(__name__)
 router = APIRouter(prefix="/api", tags=["股票分析"])
 
 # 初始化服务
 analyzer = StockAnalyzer()
-stock_list_service = StockListService()
+stock_list_service = get_stock_list_service()
 
 
 class StockRequest(BaseModel):
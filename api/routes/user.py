@@ -8,7 +8,7 @@ from pydantic import BaseModel
 
 from utils.logger import get_logger
 from services.user_stock_service import UserStockService
-from services.stock_list_service import StockListService
+from services.stock_list_service import get_stock_list_service
 from services.exchange_rate_service import get_exchange_rate_service
 from analyzers.data_fetcher import get_stock_data
 
@@ -17,7 +17,7 @@ router = APIRouter(prefix="/api", tags=["用户管理"])
 
 # 初始化服务
 user_stock_service = UserStockService()
-stock_list_service = StockListService()
+stock_list_service = get_stock_list_service()
 exchange_rate_service = get_exchange_rate_service()
 
 
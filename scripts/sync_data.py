@@ -134,16 +134,14 @@ def load_stock_list_cache():
 
 
 def get_watchlist_codes():
-    """获取用户自选股列表"""
+    """获取用户自选股列表（经 UserStockService 读取，包含尚未合并进快照的操作日志）"""
     try:
-        import json
+        from services.user_stock_service import UserStockService
         watchlist_path = os.path.join(project_root, "data", "user_stocks.json")
         if os.path.exists(watchlist_path):
-            with open(watchlist_path, 'r') as f:
-                data = json.load(f)
-                codes = [item['code'] for item in data.get('stocks', [])]
-                print(f"📋 自选股: {len(codes)} 只")
-                return codes
+            codes = UserStockService(watchlist_path).get_all_codes()
+            print(f"📋 自选股: {len(codes)} 只")
+            return codes
     except Exception as e:
         print(f"⚠️ 读取自选股失败: {e}")
     return []
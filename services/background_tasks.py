@@ -68,6 +68,8 @@ class BackgroundTaskQueue:
                     continue
                 
                 if task_data is None:
+                    # shutdown() 放入的唤醒标记
+                    self._queue.task_done()
                     continue
                 
                 task_name, func, args, kwargs = task_data
@@ -138,8 +140,24 @@ class BackgroundTaskQueue:
         """关闭任务队列"""
         logger.info("正在关闭后台任务队列...")
         self._running = False
+        # 每个工作线程放入一个唤醒标记，使其立即退出而不必等到 get() 超时
+        with self._lock:
+            for _ in self._workers:
+                self._task_counter += 1
+                self._queue.put((float('inf'), self._task_counter, None))
         for worker in self._workers:
             worker.join(timeout=5)
+        # 已退出的工作线程不会再取走剩余的唤醒标记或未执行的任务，
+        # 在此取出并标记完成，避免之后的 wait_completion() 一直阻塞
+        while True:
+            try:
+                _, _, task_data = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if task_data is not None:
+                with self._lock:
+                    self._pending_tasks.discard(task_data[0])
+            self._queue.task_done()
         logger.info("后台任务队列已关闭")
     
     @property
@@ -10,6 +10,13 @@ MAX_RETRIES = 3             # 最大重试次数
 RETRY_DELAY = 2.0           # 初始重试延迟(秒)
 RETRY_BACKOFF = 2.0         # 重试延迟倍数(指数退避)
 
+# ==================== HTTP 连接池配置 ====================
+HTTP_POOL_CONNECTIONS = 16  # 连接池数量(按主机)
+HTTP_POOL_MAXSIZE = 32      # 每个主机的最大保持连接数
+HTTP_MAX_RETRIES = 2        # 连接级重试次数
+HTTP_RETRY_BACKOFF = 0.2    # 连接级重试退避因子(秒)
+HTTP_FETCH_WORKERS = 32     # 行情分批并发请求共享线程数
+
 # ==================== 缓存配置 ====================
 MEMORY_CACHE_TTL = 300      # 内存缓存时长(秒) - 5分钟
 REALTIME_CACHE_TTL = 3      # 实时行情缓存(秒)
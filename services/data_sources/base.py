@@ -4,11 +4,84 @@
 定义统一的数据源接口，所有数据源实现都必须遵循此接口
 """
 
+import threading
 from abc import ABC, abstractmethod
-from typing import Optional, List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, List, Dict, TypeVar
 import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime
 
+from services.data_config import (
+    HTTP_POOL_CONNECTIONS,
+    HTTP_POOL_MAXSIZE,
+    HTTP_MAX_RETRIES,
+    HTTP_RETRY_BACKOFF,
+    HTTP_FETCH_WORKERS,
+)
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+# 分批请求共享线程池（进程内复用，不在每次请求时创建和销毁线程）
+_fetch_executor: Optional[ThreadPoolExecutor] = None
+_fetch_executor_lock = threading.Lock()
+
+
+def create_session(headers: Optional[Dict[str, str]] = None) -> requests.Session:
+    """
+    创建带连接池和 keep-alive 的 HTTP 会话
+    
+    Args:
+        headers: 会话级默认请求头（只设置一次，无需每次请求传入）
+    
+    Returns:
+        requests.Session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        # 只重试连接失败（请求尚未发出）；读超时不重试，避免单次请求耗时成倍超出 timeout
+        max_retries=Retry(
+            total=None, connect=HTTP_MAX_RETRIES, read=0, status=0, other=0,
+            backoff_factor=HTTP_RETRY_BACKOFF,
+        ),
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if headers:
+        session.headers.update(headers)
+    session.headers['Connection'] = 'keep-alive'
+    return session
+
+
+def get_fetch_executor() -> ThreadPoolExecutor:
+    """获取分批请求共享线程池（线程安全，延迟创建）"""
+    global _fetch_executor
+    executor = _fetch_executor
+    if executor is not None:
+        return executor
+    with _fetch_executor_lock:
+        if _fetch_executor is None:
+            _fetch_executor = ThreadPoolExecutor(
+                max_workers=HTTP_FETCH_WORKERS, thread_name_prefix='quote-fetch'
+            )
+        return _fetch_executor
+
+
+def fetch_concurrently(fetch: Callable[[T], R], batches: List[T]) -> List[R]:
+    """
+    并发执行一组网络请求，结果按批次顺序返回
+    
+    只有一个批次时直接在当前线程执行
+    """
+    if len(batches) <= 1:
+        return [fetch(batch) for batch in batches]
+    return list(get_fetch_executor().map(fetch, batches))
+
 
 class DataSource(ABC):
     """
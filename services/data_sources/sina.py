@@ -8,20 +8,30 @@ API 端点:
 - 美股指数: http://hq.sinajs.cn/list=int_dji,int_nasdaq,int_sp500
 """
 
-import re
 import time
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, Iterable, List, Any, Set, Union
 from datetime import datetime
 import requests
+import numpy as np
 import pandas as pd
 
-from .base import DataSource
+from .base import DataSource, create_session, fetch_concurrently
 from utils.logger import get_logger
+from utils.json_utils import json_loads
+from utils.stock_utils import get_stock_type
 from services.data_config import REQUEST_TIMEOUT, SINA_HEADERS
 
 logger = get_logger(__name__)
 
 
+def _safe_float(value) -> float:
+    """安全转换为浮点数，无法解析时返回 0.0"""
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return 0.0
+
+
 class SinaDataSource(DataSource):
     """
     新浪财经数据源
@@ -33,11 +43,8 @@ class SinaDataSource(DataSource):
     特点: 官方授权接口，稳定快速，无封禁风险
     """
     
-    # A股实时数据解析正则
-    STOCK_REGEX = re.compile(
-        r"(\d+)=[^\s]([^\s,]+?)%s%s"
-        % (r",([\.\d]+)" * 29, r",([-\.\d:]+)" * 2)
-    )
+    # 单次请求最大股票数
+    MAX_BATCH_SIZE = 800
     
     # 美股指数代码映射
     US_INDEX_MAP = {
@@ -61,7 +68,7 @@ class SinaDataSource(DataSource):
     }
     
     def __init__(self):
-        self._session = requests.Session()
+        self._session = create_session(self._get_headers())
         self._available = True
     
     @property
@@ -80,14 +87,12 @@ class SinaDataSource(DataSource):
     
     def _get_stock_prefix(self, code: str) -> str:
         """转换股票代码为新浪格式"""
-        if code.startswith(("sh", "sz", "bj")):
-            return code
-        if code.startswith(("5", "6", "9")):
-            return "sh" + code
-        elif code.startswith(("4", "8")):
-            return "bj" + code
-        else:
-            return "sz" + code
+        return get_stock_type(code) + code[-6:]
+    
+    def _gen_stock_prefix(self, codes: List[str]) -> List[str]:
+        """批量转换股票代码为新浪格式"""
+        _g = get_stock_type  # 局部绑定，避免逐个代码查找全局名
+        return [_g(c) + c[-6:] for c in codes]
     
     # ==================== K线数据 (不支持) ====================
     
@@ -102,116 +107,145 @@ class SinaDataSource(DataSource):
     
     # ==================== 实时行情 ====================
     
-    def get_realtime(self, codes: List[str]) -> Dict[str, Dict]:
+    def get_realtime(self, codes: Union[str, List[str]]) -> Dict[str, Dict]:
         """
         获取A股实时行情
         
         Args:
-            codes: 股票代码列表，如 ['600519', '000001']
+            codes: 股票代码或代码列表，如 '600519' 或 ['600519', '000001']
+        
+        Returns:
+            {code: {name, now, open, close, high, low, volume, ...}}
+        """
+        if isinstance(codes, str):
+            codes = [codes]
+        if len(codes) == 1:
+            # 单只股票直接请求，不经过分批与线程池
+            code = codes[0]
+            return self._fetch_realtime_batch([self._get_stock_prefix(code)], {code})
+        return self._request_realtime(self._gen_stock_prefix(codes), codes)
+    
+    def get_realtime_prefixed(self, prefixed_codes: List[str], prefix: bool = False) -> Dict[str, Dict]:
+        """
+        获取A股实时行情（代码已带市场前缀，跳过代码转换）
+        
+        Args:
+            prefixed_codes: 带前缀的股票代码列表，如 ['sh600519', 'sz000001']
+            prefix: 返回结果的键是否保留市场前缀
         
         Returns:
             {code: {name, now, open, close, high, low, volume, ...}}
         """
+        return self._request_realtime(prefixed_codes, prefixed_codes if prefix else None)
+    
+    def _request_realtime(self, sina_codes: List[str], original_codes: Optional[List[str]]) -> Dict[str, Dict]:
+        """分批（必要时并发）请求并解析实时行情"""
+        batches = [
+            sina_codes[i:i + self.MAX_BATCH_SIZE]
+            for i in range(0, len(sina_codes), self.MAX_BATCH_SIZE)
+        ]
+        
+        wanted = set(original_codes) if original_codes is not None else None
+        
+        # 多批次通过共享线程池并发请求，各批次在工作线程内边下载边解析
+        result = {}
+        for batch_result in fetch_concurrently(lambda batch: self._fetch_realtime_batch(batch, wanted), batches):
+            result.update(batch_result)
+        return result
+    
+    def _fetch_realtime_batch(self, sina_codes: List[str], wanted: Optional[Set[str]]) -> Dict[str, Dict]:
+        """请求一批实时行情并边下载边解析，失败返回空字典"""
         try:
-            # 转换代码格式
-            sina_codes = [self._get_stock_prefix(c) for c in codes]
-            codes_str = ",".join(sina_codes)
-            
-            url = f"http://hq.sinajs.cn/list={codes_str}"
-            resp = self._session.get(url, headers=self._get_headers(), timeout=REQUEST_TIMEOUT)
-            resp.encoding = 'gbk'
-            
-            return self._parse_realtime(resp.text, codes)
-            
+            url = f"http://hq.sinajs.cn/list={','.join(sina_codes)}"
+            with self._session.get(url, timeout=REQUEST_TIMEOUT, stream=True) as resp:
+                resp.encoding = 'gbk'
+                return self._parse_realtime(resp.iter_lines(decode_unicode=True), wanted)
         except requests.RequestException as e:
             logger.warning(f" [新浪] 实时行情获取失败: {e}")
             return {}
     
-    def _parse_realtime(self, text: str, original_codes: List[str]) -> Dict[str, Dict]:
-        """解析新浪实时行情数据"""
-        result = {}
-        lines = text.strip().split('\n')
+    def _parse_realtime(self, lines: Iterable[str], wanted: Optional[Set[str]]) -> Dict[str, Dict]:
+        """
+        解析新浪实时行情数据
         
-        for i, line in enumerate(lines):
-            if '="' not in line:
+        每行格式: var hq_str_sh600519="名称,开盘,昨收,现价,最高,最低,...,日期,时间,...";
+        按字符串切分解析，不逐行执行正则匹配；数值字段收集后整体一次性转换
+        wanted 为请求的原始代码集合，为 None 时统一以去前缀的代码为键
+        """
+        today = datetime.now().strftime('%Y-%m-%d')
+        keys, labels, raw = [], [], []
+        
+        for line in lines:
+            head, sep, data_str = line.partition('="')
+            # 无数据的股票 (var hq_str_xxx="";) 直接跳过
+            if not sep or data_str[:1] == '"':
+                continue
+            
+            _, found, full_code = head.rpartition('hq_str_')
+            full_code = full_code.strip()
+            if not found or not full_code:
                 continue
             
             try:
-                code_match = re.search(r'hq_str_(\w+)=', line)
-                if not code_match:
-                    continue
-                
-                full_code = code_match.group(1)
                 # 确定 Key: 优先匹配原始代码列表中的完整代码，否则尝试去前缀
                 key_code = full_code
                 pure_code = full_code[2:] if full_code[:2] in ('sh', 'sz', 'bj') else full_code
-                
-                if full_code in original_codes:
-                    key_code = full_code
-                elif pure_code in original_codes:
+                if wanted is None or (full_code not in wanted and pure_code in wanted):
                     key_code = pure_code
                 
                 # 解析数据
-                data_str = line.split('="')[1].rstrip('";')
-                if not data_str:
-                    continue
-                
-                parts = data_str.split(',')
+                parts = data_str.rstrip().rstrip('";').split(',')
                 if len(parts) < 30: # 稍微放宽长度限制
                     continue
                 
-                # 区分指数和股票的数据映射
-                # 指数代码通常以 sh000 或 sz399 开头
-                is_index = full_code.startswith(('sh000', 'sz399'))
-                
-                # 定义安全转换函数
-                def safe_float(v):
-                    try:
-                        return float(v)
-                    except (ValueError, TypeError):
-                        return 0.0
-
-                
-                if is_index:
-                    # 指数: 1=当前点数, 2=当前价格(与1相同?), 3=涨跌率? 
-                    # 实际上新浪指数接口: 1=当前, 2=昨收, 3=开盘, 4=高, 5=低
-                    name = parts[0]
-                    now = safe_float(parts[1])
-                    pre_close = safe_float(parts[2])
-                    open_price = safe_float(parts[3])
-                    high = safe_float(parts[4])
-                    low = safe_float(parts[5])
-                    volume = safe_float(parts[8])
-                    amount = safe_float(parts[9])
+                # 区分指数和股票的数据映射（指数代码通常以 sh000 或 sz399 开头）
+                # 指数: 1=当前, 2=昨收, 3=开盘；股票: 1=开盘, 2=昨收, 3=当前
+                if full_code.startswith(('sh000', 'sz399')):
+                    now_idx, open_idx = 1, 3
                 else:
-                    # 股票: 0=name, 1=open, 2=pre_close, 3=current
-                    name = parts[0]
-                    open_price = safe_float(parts[1])
-                    pre_close = safe_float(parts[2])
-                    now = safe_float(parts[3])
-                    high = safe_float(parts[4])
-                    low = safe_float(parts[5])
-                    volume = safe_float(parts[8])
-                    amount = safe_float(parts[9])
-
-                result[key_code] = {
-                    'name': name,
-                    'open': open_price,
-                    'close': pre_close,
-                    'now': now,
-                    'high': high,
-                    'low': low,
-                    'buy': 0.0,
-                    'sell': 0.0,
-                    'volume': volume,
-                    'amount': amount,
-                    'date': parts[30] if len(parts) > 30 else datetime.now().strftime('%Y-%m-%d'),
-                    'time': parts[31] if len(parts) > 31 else '',
-                }
+                    now_idx, open_idx = 3, 1
+                
+                keys.append(key_code)
+                labels.append((
+                    parts[0],
+                    parts[30] if len(parts) > 30 else today,
+                    parts[31] if len(parts) > 31 else '',
+                ))
+                # 顺序: open, close, now, high, low, volume, amount
+                raw.extend((parts[open_idx], parts[2], parts[now_idx], parts[4], parts[5], parts[8], parts[9]))
             except (ValueError, KeyError, IndexError) as e:
-                logger.error(f"解析行失败: code={key_code}, error={e}")
+                logger.error(f"解析行失败: code={full_code}, error={e}")
                 continue
         
+        if not keys:
+            return {}
+        
+        # 批量转换数值字段，空串或非法值记为 0
+        values = (
+            pd.to_numeric(pd.Series(raw, dtype=object), errors='coerce')
+            .fillna(0.0)
+            .to_numpy(dtype=np.float64)
+            .reshape(len(keys), 7)
+        )
+        
+        result = {}
+        for key_code, (name, quote_date, quote_time), row in zip(keys, labels, values.tolist()):
+            open_, close, now, high, low, volume, amount = row
+            result[key_code] = {
+                'name': name,
+                'open': open_,
+                'close': close,
+                'now': now,
+                'high': high,
+                'low': low,
+                'buy': 0.0,
+                'sell': 0.0,
+                'volume': volume,
+                'amount': amount,
+                'date': quote_date,
+                'time': quote_time,
+            }
+        
         return result
     
     # ==================== 美股指数 ====================
@@ -243,8 +277,7 @@ class SinaDataSource(DataSource):
         try:
             url = f"http://hq.sinajs.cn/list={sina_code}"
             # 港股接口必须要 Referer
-            headers = self._get_headers()
-            resp = self._session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+            resp = self._session.get(url, timeout=REQUEST_TIMEOUT)
             resp.encoding = 'gbk'
             
             text = resp.text.strip()
@@ -261,37 +294,30 @@ class SinaDataSource(DataSource):
             change_pct = 0.0
             name = ""
             
-            # 定义安全转换函数
-            def safe_float(v):
-                try:
-                    return float(v)
-                except (ValueError, TypeError):
-                    return 0.0
-            
             if sina_code.startswith('rt_hk'):
                 # 港股 (rt_hk) 格式:
                 # 0=EnName, 1=CnName, 2=Open, 3=PrevClose, 6=Price, 7=Change, 8=Pct
                 if len(parts) > 8:
                     name = parts[1]
-                    price = safe_float(parts[6])
-                    change = safe_float(parts[7])
-                    change_pct = safe_float(parts[8])
+                    price = _safe_float(parts[6])
+                    change = _safe_float(parts[7])
+                    change_pct = _safe_float(parts[8])
             elif sina_code.startswith('gb_'):
                 # 美股 (gb_) 格式:
                 # 0=Name, 1=Price, 2=Pct, 3=Time, 4=Change
                 if len(parts) > 4:
                     name = parts[0]
-                    price = safe_float(parts[1])
-                    change = safe_float(parts[4])
-                    change_pct = safe_float(parts[2])
+                    price = _safe_float(parts[1])
+                    change = _safe_float(parts[4])
+                    change_pct = _safe_float(parts[2])
             else:
                 # 旧版美股 (int_) 格式 (兼容):
                 # 0=Name, 1=Price, 2=Change, 3=Pct
                 if len(parts) >= 4:
                     name = parts[0]
-                    price = safe_float(parts[1])
-                    change = safe_float(parts[2])
-                    change_pct = safe_float(parts[3])
+                    price = _safe_float(parts[1])
+                    change = _safe_float(parts[2])
+                    change_pct = _safe_float(parts[3])
             
             if price > 0:
                 # logger.info(f" [新浪] {display_symbol}: {price}, {change_pct}%")
@@ -332,8 +358,8 @@ class SinaDataSource(DataSource):
                 "datalen": "48"  # 一天约48个5分钟
             }
             
-            resp = self._session.get(url, params=params, headers=self._get_headers(), timeout=REQUEST_TIMEOUT)
-            data = resp.json()
+            resp = self._session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+            data = json_loads(resp.content)
             
             if not data:
                 return None
@@ -13,16 +13,38 @@ import re
 import time
 from typing import Optional, Dict, List, Any, Tuple
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 import requests
 
-from .base import DataSource
+from .base import DataSource, create_session, fetch_concurrently
 from utils.logger import get_logger
+from utils.stock_utils import get_stock_type
 from services.data_config import REQUEST_TIMEOUT, TENCENT_HEADERS
 
 logger = get_logger(__name__)
 
 
+# 实时行情数值字段及其在 ~ 分隔数据中的下标
+REALTIME_NUMERIC_FIELDS = (
+    ('now', 3),
+    ('close', 4),  # 昨收
+    ('open', 5),
+    ('volume', 6),
+    ('buy_volume', 7),
+    ('sell_volume', 8),
+    ('buy1', 9),
+    ('sell1', 19),
+    ('high', 33),
+    ('low', 34),
+    ('amount', 37),
+    ('change_pct', 32),
+    ('change', 31),
+)
+_NUMERIC_NAMES = tuple(name for name, _ in REALTIME_NUMERIC_FIELDS)
+_NUMERIC_INDEXES = tuple(idx for _, idx in REALTIME_NUMERIC_FIELDS)
+
+
 class TencentDataSource(DataSource):
     """
     腾讯财经数据源
@@ -36,11 +58,11 @@ class TencentDataSource(DataSource):
     特点: 速度快、稳定、支持前复权，最多获取640天
     """
     
-    # 实时数据解析正则
-    STOCK_CODE_REGEX = re.compile(r"(?<=_)\w+")
+    # 实时行情单次请求最大股票数
+    MAX_BATCH_SIZE = 60
     
     def __init__(self):
-        self._session = requests.Session()
+        self._session = create_session(self._get_headers())
         self._available = True
     
     @property
@@ -59,14 +81,12 @@ class TencentDataSource(DataSource):
     
     def _get_symbol(self, code: str) -> str:
         """转换A股代码为腾讯格式"""
-        if code.startswith(("sh", "sz", "bj")):
-            return code
-        if code.startswith(("5", "6", "9")):
-            return "sh" + code
-        elif code.startswith(("4", "8")):
-            return "bj" + code
-        else:
-            return "sz" + code
+        return get_stock_type(code) + code[-6:]
+    
+    def _gen_stock_prefix(self, codes: List[str]) -> List[str]:
+        """批量转换A股代码为腾讯格式"""
+        _g = get_stock_type  # 局部绑定，避免逐个代码查找全局名
+        return [_g(c) + c[-6:] for c in codes]
     
     def _format_hk_code(self, code: str) -> str:
         """格式化港股代码"""
@@ -111,7 +131,7 @@ class TencentDataSource(DataSource):
                 data = None
                 for attempt in range(3):
                     try:
-                        resp = self._session.get(url, headers=self._get_headers(), timeout=REQUEST_TIMEOUT)
+                        resp = self._session.get(url, timeout=REQUEST_TIMEOUT)
                         data = resp.json()
                         break
                     except (requests.RequestException, Exception):
@@ -188,23 +208,51 @@ class TencentDataSource(DataSource):
         Returns:
             {code: {name, now, open, close, high, low, volume, ...}}
         """
+        return self._request_realtime(self._gen_stock_prefix(codes), codes)
+    
+    def get_realtime_prefixed(self, prefixed_codes: List[str], prefix: bool = False) -> Dict[str, Dict]:
+        """
+        获取A股实时行情（代码已带市场前缀，跳过代码转换）
+        
+        Args:
+            prefixed_codes: 带前缀的股票代码列表，如 ['sh600519', 'sz000001']
+            prefix: 返回结果的键是否保留市场前缀
+        
+        Returns:
+            {code: {name, now, open, close, high, low, volume, ...}}
+        """
+        return self._request_realtime(prefixed_codes, prefixed_codes, prefix)
+    
+    def _request_realtime(self, tencent_codes: List[str], original_codes: List[str], prefix: bool = False) -> Dict[str, Dict]:
+        """分批（多批次时并发）请求并解析实时行情"""
+        batches = [
+            tencent_codes[i:i + self.MAX_BATCH_SIZE]
+            for i in range(0, len(tencent_codes), self.MAX_BATCH_SIZE)
+        ]
+        texts = [t for t in fetch_concurrently(self._fetch_realtime_batch, batches) if t]
+        if not texts:
+            return {}
+        return self._parse_realtime("\n".join(texts), original_codes, prefix)
+    
+    def _fetch_realtime_batch(self, tencent_codes: List[str]) -> Optional[str]:
+        """请求一批实时行情，失败返回 None"""
         try:
-            tencent_codes = [self._get_symbol(c) for c in codes]
-            codes_str = ",".join(tencent_codes)
-            
-            url = f"http://qt.gtimg.cn/q={codes_str}"
-            resp = self._session.get(url, headers=self._get_headers(), timeout=REQUEST_TIMEOUT)
+            url = f"http://qt.gtimg.cn/q={','.join(tencent_codes)}"
+            resp = self._session.get(url, timeout=REQUEST_TIMEOUT)
             resp.encoding = 'gbk'
-            
-            return self._parse_realtime(resp.text, codes)
-            
+            return resp.text
         except Exception as e:
             logger.warning(f" [腾讯] 实时行情获取失败: {e}")
-            return {}
+            return None
     
-    def _parse_realtime(self, text: str, original_codes: List[str]) -> Dict[str, Dict]:
-        """解析腾讯实时行情"""
-        result = {}
+    def _parse_realtime(self, text: str, original_codes: List[str], prefix: bool = False) -> Dict[str, Dict]:
+        """
+        解析腾讯实时行情（prefix 为 True 时以带市场前缀的代码为键）
+        
+        先逐行切分收集各股票的数值字段，再整体一次性转换为浮点数组，
+        避免在循环内逐字段调用 float()
+        """
+        keys, labels, raw = [], [], []
         lines = text.strip().split('\n')
         
         for line in lines:
@@ -212,47 +260,43 @@ class TencentDataSource(DataSource):
                 continue
             
             try:
-                # 提取代码
-                code_match = self.STOCK_CODE_REGEX.search(line)
-                if not code_match:
+                # 提取代码 (行格式: v_sh600519="1~贵州茅台~600519~...";)
+                head, _, data_part = line.partition('="')
+                full_code = head[head.rfind('_') + 1:].strip()
+                if not full_code:
                     continue
                 
-                full_code = code_match.group()
                 pure_code = full_code[2:] if full_code[:2] in ('sh', 'sz', 'bj') else full_code
                 
                 # 解析数据 (腾讯用~分隔)
-                data_part = line.split('="')[1].rstrip('";') if '="' in line else ""
-                parts = data_part.split('~')
+                parts = data_part.rstrip().rstrip('";').split('~')
                 
                 if len(parts) < 45:
                     continue
                 
-                def safe_float(s):
-                    try:
-                        return float(s) if s else 0.0
-                    except (ValueError, TypeError):
-                        return 0.0
-                
-                result[pure_code] = {
-                    'name': parts[1],
-                    'code': parts[2],
-                    'now': safe_float(parts[3]),
-                    'close': safe_float(parts[4]),  # 昨收
-                    'open': safe_float(parts[5]),
-                    'volume': safe_float(parts[6]),
-                    'buy_volume': safe_float(parts[7]),
-                    'sell_volume': safe_float(parts[8]),
-                    'buy1': safe_float(parts[9]),
-                    'sell1': safe_float(parts[19]),
-                    'high': safe_float(parts[33]),
-                    'low': safe_float(parts[34]),
-                    'amount': safe_float(parts[37]),
-                    'change_pct': safe_float(parts[32]),
-                    'change': safe_float(parts[31]),
-                }
+                keys.append(full_code if prefix else pure_code)
+                labels.append((parts[1], parts[2]))
+                raw.extend([parts[i] for i in _NUMERIC_INDEXES])
             except (ValueError, IndexError, KeyError):
                 continue
         
+        if not keys:
+            return {}
+        
+        # 批量转换数值字段，空串或非法值记为 0
+        values = (
+            pd.to_numeric(pd.Series(raw, dtype=object), errors='coerce')
+            .fillna(0.0)
+            .to_numpy(dtype=np.float64)
+            .reshape(len(keys), len(_NUMERIC_INDEXES))
+        )
+        
+        result = {}
+        for key, (name, code), row in zip(keys, labels, values.tolist()):
+            quote = {'name': name, 'code': code}
+            quote.update(zip(_NUMERIC_NAMES, row))
+            result[key] = quote
+        
         return result
     
     # ==================== A股分时数据 ====================
@@ -271,7 +315,7 @@ class TencentDataSource(DataSource):
             symbol = self._get_symbol(code)
             url = f"http://data.gtimg.cn/flashdata/hushen/minute/{symbol}.js"
             
-            resp = self._session.get(url, headers=self._get_headers(), timeout=REQUEST_TIMEOUT)
+            resp = self._session.get(url, timeout=REQUEST_TIMEOUT)
             resp.encoding = 'gbk'
             
             # 解析数据
@@ -321,7 +365,7 @@ class TencentDataSource(DataSource):
             hk_code = self._format_hk_code(code)
             url = f"http://web.ifzq.gtimg.cn/appstock/app/hkfqkline/get?_var=kline_dayqfq&param={hk_code},day,,,{days},qfq"
             
-            resp = self._session.get(url, headers=self._get_headers(), timeout=REQUEST_TIMEOUT)
+            resp = self._session.get(url, timeout=REQUEST_TIMEOUT)
             resp.encoding = 'utf-8'
             
             # 解析JS变量格式
@@ -405,7 +449,7 @@ class TencentDataSource(DataSource):
         """通用全球指数解析 (腾讯格式)"""
         try:
             url = f"http://qt.gtimg.cn/q={code}"
-            resp = self._session.get(url, headers=self._get_headers(), timeout=REQUEST_TIMEOUT)
+            resp = self._session.get(url, timeout=REQUEST_TIMEOUT)
             resp.encoding = 'gbk'  # 腾讯通常是GBK
             
             text = resp.text.strip()
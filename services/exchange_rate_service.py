@@ -21,6 +21,7 @@ from datetime import datetime
 
 from utils.logger import get_logger
 from services.data_config import REQUEST_TIMEOUT
+from services.data_sources.base import create_session
 
 logger = get_logger(__name__)
 
@@ -31,7 +32,8 @@ class BocExchangeRate:
     url = "http://www.boc.cn/sourcedb/whpj/"
     
     def __init__(self):
-        self._session = requests.Session()
+        # 连接池 + keep-alive，后续请求复用已建立的连接
+        self._session = create_session(self._get_headers())
     
     def _get_headers(self) -> dict:
         return {
@@ -55,8 +57,7 @@ class BocExchangeRate:
             }
         """
         try:
-            headers = self._get_headers()
-            r = self._session.get(self.url, headers=headers, timeout=REQUEST_TIMEOUT)
+            r = self._session.get(self.url, timeout=REQUEST_TIMEOUT)
             r.encoding = 'utf-8'
             
             # 提取所有的表格单元格数据
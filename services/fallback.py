@@ -15,6 +15,9 @@ logger = get_logger(__name__)
 
 T = TypeVar('T')
 
+# 限流计时使用单调时钟（不受系统时间调整影响），模块级绑定便于测试替换
+_now = time.monotonic
+
 
 class FallbackExecutor:
     """
@@ -129,16 +132,16 @@ def rate_limited(delay: float = 1.0):
     Args:
         delay: 调用间隔秒数
     """
-    last_call = [0.0]  # 使用列表以便在闭包中修改
+    last_call = [float('-inf')]  # 使用列表以便在闭包中修改；首次调用不等待
     
     def decorator(func: Callable) -> Callable:
         @wraps(func)
         def wrapper(*args, **kwargs):
-            elapsed = time.time() - last_call[0]
+            elapsed = _now() - last_call[0]
             if elapsed < delay:
                 time.sleep(delay - elapsed)
             result = func(*args, **kwargs)
-            last_call[0] = time.time()
+            last_call[0] = _now()
             return result
         return wrapper
     return decorator
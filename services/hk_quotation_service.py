@@ -18,10 +18,11 @@
 import re
 import time
 from typing import Dict, List, Union, Optional
-import requests
 
 from utils.logger import get_logger
+from utils.stock_utils import format_hk_code
 from services.data_config import REQUEST_TIMEOUT
+from services.data_sources.base import create_session
 
 logger = get_logger(__name__)
 
@@ -32,7 +33,8 @@ class HKQuotation:
     max_num = 50  # 每次请求最大股票数
     
     def __init__(self):
-        self._session = requests.Session()
+        # 连接池 + keep-alive，后续请求复用已建立的连接
+        self._session = create_session(self._get_headers())
     
     @property
     def stock_api(self) -> str:
@@ -64,8 +66,7 @@ class HKQuotation:
     def _fetch_stocks(self, stock_list: str) -> Optional[str]:
         """获取一批股票数据"""
         try:
-            headers = self._get_headers()
-            r = self._session.get(self.stock_api + stock_list, headers=headers, timeout=REQUEST_TIMEOUT)
+            r = self._session.get(self.stock_api + stock_list, timeout=REQUEST_TIMEOUT)
             r.encoding = 'utf-8'
             return r.text
         except Exception as e:
@@ -210,6 +211,20 @@ class HKQuotationService:
             for stock_code, info in data.items():
                 return info
         return None
+    
+    def get_many_details(self, codes: List[str]) -> Dict[str, Dict]:
+        """
+        批量获取港股详细信息（一次请求代替逐只调用 get_stock_detail）
+        
+        Args:
+            codes: 港股代码列表，格式可混用 (如 '700', '00700', 'hk00700')
+        
+        Returns:
+            {5位代码: 详细行情数据}，可用 format_hk_code(code) 取对应结果
+        """
+        # 先在本地统一格式并去重，同一只股票只请求一次
+        unique_codes = list(dict.fromkeys(format_hk_code(code) for code in codes))
+        return self._quotation.get_realtime(unique_codes)
 
 
 # 全局单例
@@ -13,11 +13,14 @@
     realtime = service.get_realtime_as_kline('600519')
 """
 
-from datetime import datetime, date
+import threading
+import time
+from datetime import date
 from typing import Dict, List, Optional, Union
 import pandas as pd
 
 from utils.logger import get_logger
+from utils.stock_utils import get_stock_type
 from .realtime_quotation_service import get_realtime_service, RealtimeQuotationService
 from .local_data_service import get_local_data_service, LocalDataService
 
@@ -140,12 +143,13 @@ class RealtimeKlineService:
         """获取单只股票实时行情"""
         try:
             data = self._realtime_service.get_realtime(code)
-            if data and code in data:
-                return data[code]
-            # 尝试去掉前缀
-            for key in data:
-                if key.endswith(code):
-                    return data[key]
+            if not data:
+                return None
+            quote = data.get(code)
+            if quote is None:
+                # 数据源可能以带市场前缀的代码为键 (如 sh600519)
+                quote = data.get(get_stock_type(code) + code[-6:])
+            return quote
         except (KeyError, TypeError, AttributeError) as e:
             logger.warning(f"获取 {code} 实时行情失败: {e}")
         return None
@@ -164,7 +168,7 @@ class RealtimeKlineService:
             change_pct = round((now - close) / close * 100, 2)
         
         return {
-            "time": quote.get('date', datetime.now().strftime('%Y-%m-%d')),
+            "time": quote.get('date') or date.today().isoformat(),
             "open": float(quote.get('open', 0)),
             "high": float(quote.get('high', 0)),
             "low": float(quote.get('low', 0)),
@@ -175,15 +179,15 @@ class RealtimeKlineService:
             "change_pct": change_pct,
             "bid1": float(quote.get('bid1', 0)),
             "ask1": float(quote.get('ask1', 0)),
-            "update_time": quote.get('time', datetime.now().strftime('%H:%M:%S')),
+            "update_time": quote.get('time') or time.strftime('%H:%M:%S'),
         }
     
     def _merge_realtime(self, history: List[dict], realtime: dict) -> List[dict]:
-        """合并历史K线与实时行情"""
+        """合并历史K线与实时行情（原地更新 history 并返回）"""
         if not realtime or realtime.get('now', 0) == 0:
             return history
         
-        today = datetime.now().strftime('%Y-%m-%d')
+        today = date.today().isoformat()
         realtime_date = realtime.get('date', today)
         
         # 如果实时数据日期不是今天，直接返回历史数据
@@ -195,26 +199,28 @@ class RealtimeKlineService:
         if not realtime_kline:
             return history
         
-        # 查找并更新/添加当日K线
-        result = history.copy()
-        found_today = False
-        
-        for i, kline in enumerate(result):
-            if kline.get('time') == today:
-                # 更新当日K线（用实时数据覆盖）
-                result[i] = {
-                    **kline,
-                    "close": realtime_kline['close'],
-                    "high": max(kline.get('high', 0), realtime_kline['high']),
-                    "low": min(kline.get('low', float('inf')), realtime_kline['low']) if realtime_kline['low'] > 0 else kline.get('low', 0),
-                    "volume": realtime_kline['volume'],
-                }
-                found_today = True
-                break
-        
-        # 如果历史数据中没有当日，添加新的K线
-        if not found_today and realtime_kline['close'] > 0:
-            result.append({
+        # 查找并更新/添加当日K线（当日K线通常位于末尾，直接原地更新）
+        today_kline = None
+        if history and history[-1].get('time') == today:
+            today_kline = history[-1]
+        else:
+            for kline in history:
+                if kline.get('time') == today:
+                    today_kline = kline
+                    break
+        
+        if today_kline is not None:
+            # 更新当日K线（用实时数据覆盖）
+            today_kline['close'] = realtime_kline['close']
+            today_kline['high'] = max(today_kline.get('high', 0), realtime_kline['high'])
+            if realtime_kline['low'] > 0:
+                today_kline['low'] = min(today_kline.get('low', float('inf')), realtime_kline['low'])
+            else:
+                today_kline['low'] = today_kline.get('low', 0)
+            today_kline['volume'] = realtime_kline['volume']
+        elif realtime_kline['close'] > 0:
+            # 如果历史数据中没有当日，添加新的K线
+            history.append({
                 "time": today,
                 "open": realtime_kline['open'],
                 "high": realtime_kline['high'],
@@ -223,16 +229,21 @@ class RealtimeKlineService:
                 "volume": realtime_kline['volume'],
             })
         
-        return result
+        return history
 
 
 # 全局单例
 _kline_service: Optional[RealtimeKlineService] = None
+_kline_lock = threading.Lock()
 
 
 def get_realtime_kline_service(source: str = 'sina') -> RealtimeKlineService:
-    """获取实时K线服务单例"""
+    """获取实时K线服务单例（线程安全）"""
     global _kline_service
-    if _kline_service is None:
-        _kline_service = RealtimeKlineService(realtime_source=source)
-    return _kline_service
+    service = _kline_service
+    if service is not None:
+        return service
+    with _kline_lock:
+        if _kline_service is None:
+            _kline_service = RealtimeKlineService(realtime_source=source)
+        return _kline_service
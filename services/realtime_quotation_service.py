@@ -17,31 +17,67 @@
 """
 
 import re
+import sys
 import time
-import json
 import os
-from typing import Dict, List, Union, Optional
-from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Tuple, Union, Optional
+import threading
+import numpy as np
+import pandas as pd
+from concurrent.futures import Future, ThreadPoolExecutor
 import requests
-from datetime import datetime
+from datetime import date, datetime
 
 from utils.logger import get_logger
 from services.data_config import REQUEST_TIMEOUT
+from utils.json_utils import json_loads
 
 logger = get_logger(__name__)
 
 
-from datetime import datetime
-
-from utils.stock_utils import get_stock_type  # 使用统一的工具函数
+from utils.stock_utils import get_stock_type, quotes_to_dataframe  # 使用统一的工具函数
 # 使用统一的数据源模块
 from services.data_sources import SinaDataSource, TencentDataSource
+from services.data_sources.base import fetch_concurrently
 
 
 # 股票代码路径
 STOCK_CODE_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "stock_codes.json")
 
 
+# 东方财富 secid 市场前缀 (1=上交所, 0=深交所/北交所)
+_SECID_PREFIX = {'sh': '1.', 'sz': '0.', 'bj': '0.'}
+
+# 分时数据列名（内部按列存储，响应时再转为记录列表）
+INTRADAY_FIELDS = ('time', 'price', 'avg', 'volume')
+
+
+def _new_intraday_columns() -> Dict[str, list]:
+    """创建空的分时数据列容器"""
+    return {field: [] for field in INTRADAY_FIELDS}
+
+
+def _intraday_records(columns: Dict[str, list]) -> List[Dict]:
+    """将按列存储的分时数据转换为 [{time, price, avg, volume}, ...]"""
+    if not columns:
+        return []
+    return [dict(zip(INTRADAY_FIELDS, row)) for row in zip(*(columns[f] for f in INTRADAY_FIELDS))]
+
+
+def _copy_quotes(quotes: Dict[str, Dict]) -> Dict[str, Dict]:
+    """复制行情结果（外层和每只股票的行情字典），调用方修改不影响缓存和其他调用方"""
+    return {code: dict(quote) for code, quote in quotes.items()}
+
+
+@lru_cache(maxsize=1)
+def _load_codes_cached(path: str) -> Tuple[str, ...]:
+    """读取股票代码文件（进程内只解析一次，各服务实例共享）"""
+    with open(path, 'rb') as f:
+        data = json_loads(f.read())
+    return tuple(sys.intern(code) for code in data.get("stock", []))
+
 
 class RealtimeQuotationService:
     """
@@ -50,10 +86,8 @@ class RealtimeQuotationService:
     支持新浪和腾讯两个数据源，默认使用新浪（更稳定）
     """
     
-    # 类级别缓存
-    _cache: Dict = {}
-    _cache_time: float = 0
     _cache_ttl: int = 3  # 缓存3秒
+    _cache_max_entries: int = 64  # 最多缓存的请求组合数
     
     def __init__(self, source: str = 'sina'):
         """
@@ -74,18 +108,27 @@ class RealtimeQuotationService:
         else:
             raise ValueError(f"不支持的数据源: {source}，请使用 'sina' 或 'tencent'")
         
+        # 行情缓存 (LRU + TTL): {key: (写入时间, 结果)}
+        self._quote_cache: "OrderedDict[tuple, Tuple[float, Dict]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
+        # 进行中的容灾请求（相同代码集合的并发请求共享同一次上游调用）
+        self._inflight: Dict[frozenset, Future] = {}
+        self._inflight_lock = threading.Lock()
+        
         # 加载股票代码列表
-        self._stock_codes: List[str] = []
+        self._stock_codes: Tuple[str, ...] = ()
+        self._prefixed_codes: Tuple[str, ...] = ()
         self._load_stock_codes()
     
     def _load_stock_codes(self):
         """加载全市场股票代码"""
         try:
             if os.path.exists(STOCK_CODE_PATH):
-                with open(STOCK_CODE_PATH) as f:
-                    data = json.load(f)
-                    self._stock_codes = data.get("stock", [])
-                    logger.info(f"加载股票代码列表: {len(self._stock_codes)} 只")
+                self._stock_codes = _load_codes_cached(STOCK_CODE_PATH)
+                # 代码列表在会话内不变，带前缀的代码只生成一次
+                self._prefixed_codes = tuple(self._quotation._gen_stock_prefix(self._stock_codes))
+                logger.info(f"加载股票代码列表: {len(self._stock_codes)} 只")
             else:
                 logger.warning(f"股票代码文件不存在: {STOCK_CODE_PATH}")
         except Exception as e:
@@ -104,7 +147,25 @@ class RealtimeQuotationService:
         """
         if isinstance(codes, str):
             codes = [codes]
-        return self._quotation.get_realtime(codes)
+        
+        cache_key = (frozenset(codes), prefix)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
+        result = self._quotation.get_realtime(codes)
+        self._cache_put(cache_key, result)
+        return result
+    
+    def get_realtime_df(self, codes: Union[str, List[str]], prefix: bool = False) -> pd.DataFrame:
+        """
+        获取实时行情（DataFrame 格式，每只股票一行，列见 QUOTE_COLUMNS）
+        
+        Args:
+            codes: 股票代码或代码列表
+            prefix: 是否在返回结果中带有市场前缀 (sh/sz/bj)
+        """
+        return quotes_to_dataframe(self.get_realtime(codes, prefix=prefix))
     
     def get_market_snapshot(self, limit: int = 100, prefix: bool = False) -> Dict:
         """
@@ -118,34 +179,56 @@ class RealtimeQuotationService:
             {代码: {name, now, open, close, high, low, ...}}
         """
         # 检查缓存
-        current_time = time.time()
-        cache_key = f"market_{limit}_{prefix}"
-        
-        if (cache_key in self._cache and 
-            (current_time - self._cache_time) < self._cache_ttl):
-            return self._cache[cache_key]
+        cache_key = ('market', limit, prefix)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
         
         # 获取股票列表
         if not self._stock_codes:
             logger.warning("股票代码列表为空")
             return {}
         
-        codes = self._stock_codes[:limit] if limit > 0 else self._stock_codes
+        codes = self._prefixed_codes[:limit] if limit > 0 else self._prefixed_codes
         
         # 获取行情
-        result = self._quotation.get_realtime(codes)
+        result = self._quotation.get_realtime_prefixed(codes, prefix)
         
         # 更新缓存
-        self._cache[cache_key] = result
-        self._cache_time = current_time
+        self._cache_put(cache_key, result)
         
         return result
     
+    def _cache_get(self, key: tuple) -> Optional[Dict]:
+        """读取未过期的缓存结果（返回副本，调用方修改不影响缓存）"""
+        with self._cache_lock:
+            entry = self._quote_cache.get(key)
+            if entry is None:
+                return None
+            cached_at, value = entry
+            if time.time() - cached_at >= self._cache_ttl:
+                del self._quote_cache[key]
+                return None
+            self._quote_cache.move_to_end(key)
+        return _copy_quotes(value)
+    
+    def _cache_put(self, key: tuple, value: Dict):
+        """写入缓存副本（调用方之后修改结果不影响缓存），超出容量时淘汰最久未使用的条目（空结果不缓存）"""
+        if not value:
+            return
+        value = _copy_quotes(value)
+        with self._cache_lock:
+            self._quote_cache[key] = (time.time(), value)
+            self._quote_cache.move_to_end(key)
+            while len(self._quote_cache) > self._cache_max_entries:
+                self._quote_cache.popitem(last=False)
+    
     def get_realtime_with_fallback(self, codes: Union[str, List[str]], prefix: bool = False) -> Dict:
         """
         获取实时行情（带容灾切换）
         
         数据源优先级: 新浪 → 腾讯 → 东方财富（配置驱动）
+        相同代码集合的并发请求只会触发一次上游调用
         
         Args:
             codes: 股票代码或代码列表
@@ -160,10 +243,33 @@ class RealtimeQuotationService:
         if isinstance(codes, str):
             codes = [codes]
         
-        executor = create_realtime_executor(codes)
-        result = executor.execute()
+        key = frozenset(codes)
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._inflight[key] = future
+        
+        if not is_owner:
+            # 不设超时：发起方会依次尝试所有数据源（每个都有各自的请求超时），一定会完成
+            try:
+                return _copy_quotes(future.result())
+            except Exception as e:
+                logger.warning(f"等待实时行情请求结果失败: {e}")
+                return {}
         
-        return result if result else {}
+        try:
+            executor = create_realtime_executor(codes)
+            result = executor.execute() or {}
+            future.set_result(result)
+            return _copy_quotes(result)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
     
     def _get_realtime_from_eastmoney(self, code: str) -> Optional[Dict]:
         """
@@ -181,7 +287,7 @@ class RealtimeQuotationService:
     
     def get_stock_codes(self) -> List[str]:
         """获取全市场股票代码列表"""
-        return self._stock_codes.copy()
+        return list(self._stock_codes)
     
     def get_intraday(self, stock_code: str) -> Dict:
         """
@@ -217,13 +323,13 @@ class RealtimeQuotationService:
         # 使用容灾执行器获取分时数据
         def get_from_eastmoney():
             data, data_date, preClose = self._get_intraday_from_eastmoney(stock_code)
-            if data and len(data) > 0:
+            if data.get('time'):
                 return {'data': data, 'date': data_date, 'preClose': preClose}
             return None
         
         def get_from_tencent():
             data, data_date = self._get_intraday_from_tencent(stock_code)
-            if data and len(data) > 0:
+            if data.get('time'):
                 return {'data': data, 'date': data_date, 'preClose': 0}
             return None
         
@@ -241,18 +347,25 @@ class RealtimeQuotationService:
             return self._build_intraday_response(stock_code, quote, result['data'], result['date'])
         
         # 所有数据源都失败
-        return self._build_intraday_response(stock_code, quote, [], None)
+        return self._build_intraday_response(stock_code, quote, {}, None)
+    
+    def get_intraday_batch(self, stock_codes: List[str]) -> Dict[str, Dict]:
+        """
+        批量获取分时数据（各股票并发请求）
+        
+        Args:
+            stock_codes: 6位股票代码列表
+        
+        Returns:
+            {代码: get_intraday 的返回结果}
+        """
+        codes = list(dict.fromkeys(stock_codes))  # 去重并保持顺序
+        return dict(zip(codes, fetch_concurrently(self.get_intraday, codes)))
     
     def _get_intraday_from_eastmoney(self, stock_code: str) -> tuple:
         """从东方财富获取分时数据"""
         try:
-            prefix = get_stock_type(stock_code)
-            if prefix == 'sz':
-                secid = f"0.{stock_code}"
-            elif prefix == 'sh':
-                secid = f"1.{stock_code}"
-            else:
-                secid = f"0.{stock_code}"
+            secid = _SECID_PREFIX.get(get_stock_type(stock_code), '0.') + stock_code
             
             url = f"https://push2his.eastmoney.com/api/qt/stock/trends2/get?secid={secid}&fields1=f1,f2,f3,f4,f5,f6,f7,f8,f9,f10,f11,f12,f13&fields2=f51,f52,f53,f54,f55,f56,f57,f58&iscr=0&iscca=0&ndays=1"
             
@@ -264,33 +377,35 @@ class RealtimeQuotationService:
             response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
             
             if response.status_code != 200:
-                return [], None, 0
+                return {}, None, 0
             
-            result = response.json()
+            result = json_loads(response.content)
             
             if result.get('rc') != 0 or not result.get('data'):
-                return [], None, 0
+                return {}, None, 0
             
             data = result['data']
             trends = data.get('trends', [])
             preClose = float(data.get('preClose', 0))
             
             if not trends:
-                return [], None, preClose
+                return {}, None, preClose
             
-            # 解析分时数据
-            formatted_data = []
+            # 解析分时数据（按列存储）
+            columns = _new_intraday_columns()
+            times, prices, avgs, volumes = (columns[f] for f in INTRADAY_FIELDS)
             data_date = None
             
             for trend in trends:
                 try:
-                    parts = trend.split(',')
+                    # 只用到前8个字段，限制切分次数
+                    parts = trend.split(',', 8)
                     if len(parts) < 7:
                         continue
                     
                     time_str = parts[0]
                     if ' ' in time_str:
-                        date_part, time_part = time_str.split(' ')
+                        date_part, _, time_part = time_str.partition(' ')
                         if not data_date:
                             data_date = date_part
                         time_str = time_part[:5]
@@ -299,21 +414,19 @@ class RealtimeQuotationService:
                     volume = int(float(parts[5])) if parts[5] else 0
                     avg_price = float(parts[7]) if len(parts) > 7 and parts[7] else price
                     
-                    formatted_data.append({
-                        'time': time_str,
-                        'price': price,
-                        'avg': round(avg_price, 2),
-                        'volume': volume
-                    })
+                    times.append(time_str)
+                    prices.append(price)
+                    avgs.append(round(avg_price, 2))
+                    volumes.append(volume)
                 except (ValueError, IndexError):
                     continue
             
-            logger.debug(f"[东方财富] {stock_code} 分时数据 {len(formatted_data)} 条")
-            return formatted_data, data_date, preClose
+            logger.debug(f"[东方财富] {stock_code} 分时数据 {len(times)} 条")
+            return columns, data_date, preClose
             
         except Exception as e:
             logger.warning(f"[东方财富] {stock_code} 分时数据失败: {e}")
-            return [], None, 0
+            return {}, None, 0
     
     def _get_intraday_from_tencent(self, stock_code: str) -> tuple:
         """从腾讯获取分时数据"""
@@ -331,7 +444,7 @@ class RealtimeQuotationService:
             response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
             
             if response.status_code != 200:
-                return [], None
+                return {}, None
             
             # 解析腾讯分时数据格式
             text = response.text
@@ -339,55 +452,58 @@ class RealtimeQuotationService:
             
             lines = text.split('\\n')
             if len(lines) < 2:
-                return [], None
+                return {}, None
             
             data_date = lines[0].strip() if lines[0] else datetime.now().strftime('%Y%m%d')
             # 转换日期格式
             if len(data_date) == 8:
                 data_date = f"{data_date[:4]}-{data_date[4:6]}-{data_date[6:8]}"
             
-            formatted_data = []
-            prices = []
+            columns = _new_intraday_columns()
+            times, prices, volumes = columns['time'], columns['price'], columns['volume']
             
             for line in lines[1:]:
-                if not line.strip():
+                line = line.strip()
+                if not line:
                     continue
                 try:
-                    parts = line.strip().split(' ')
-                    if len(parts) < 3:
+                    # 格式: "hhmm 价格 成交量"
+                    time_raw, _, rest = line.partition(' ')
+                    price_str, _, volume_str = rest.partition(' ')
+                    if not volume_str:
                         continue
                     
-                    time_raw = parts[0]  # 格式: 0930
+                    # 格式: 0930
                     if len(time_raw) == 4:
                         time_str = f"{time_raw[:2]}:{time_raw[2:]}"
                     else:
                         time_str = time_raw
                     
-                    price = float(parts[1])
-                    volume = int(parts[2])
+                    price = float(price_str)
+                    volume = int(volume_str.partition(' ')[0])
                     
+                    times.append(time_str)
                     prices.append(price)
-                    avg_price = sum(prices) / len(prices)
-                    
-                    formatted_data.append({
-                        'time': time_str,
-                        'price': price,
-                        'avg': round(avg_price, 2),
-                        'volume': volume
-                    })
+                    volumes.append(volume)
                 except (ValueError, IndexError):
                     continue
             
-            if formatted_data:
-                logger.debug(f"[腾讯] {stock_code} 分时数据 {len(formatted_data)} 条")
-            return formatted_data, data_date
+            # 均价为截至每分钟的价格累计均值，整列一次计算
+            if prices:
+                price_arr = np.asarray(prices, dtype=np.float64)
+                avg_arr = np.cumsum(price_arr) / np.arange(1, len(price_arr) + 1)
+                columns['avg'] = np.round(avg_arr, 2).tolist()
+            
+            if times:
+                logger.debug(f"[腾讯] {stock_code} 分时数据 {len(times)} 条")
+            return columns, data_date
             
         except Exception as e:
             logger.warning(f"[腾讯] {stock_code} 分时数据失败: {e}")
-            return [], None
+            return {}, None
     
-    def _build_intraday_response(self, stock_code: str, quote: Dict, data: List, data_date: Optional[str]) -> Dict:
-        """构建分时数据响应"""
+    def _build_intraday_response(self, stock_code: str, quote: Dict, data: Dict[str, list], data_date: Optional[str]) -> Dict:
+        """构建分时数据响应（按列数据在此转换为前端使用的记录列表）"""
         now = float(quote.get('now', 0))
         close = float(quote.get('close', now))
         change_pct = round((now - close) / close * 100, 2) if close > 0 else 0
@@ -403,9 +519,9 @@ class RealtimeQuotationService:
             'change_pct': change_pct,
             'volume': int(quote.get('turnover', 0)),
             'turnover': float(quote.get('volume', 0)),
-            'data': data,
-            'date': data_date or datetime.now().strftime('%Y-%m-%d'),  # 数据日期
-            'update_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            'data': _intraday_records(data),
+            'date': data_date or date.today().isoformat(),  # 数据日期
+            'update_time': time.strftime('%Y-%m-%d %H:%M:%S')
         }
     
     @property
@@ -414,26 +530,30 @@ class RealtimeQuotationService:
         return len(self._stock_codes)
 
 
-# 全局单例
-_realtime_service: Optional[RealtimeQuotationService] = None
+# 全局单例（按数据源缓存，切换数据源不会销毁已有实例）
+_realtime_services: Dict[str, RealtimeQuotationService] = {}
+_realtime_lock = threading.Lock()
 
 
 def get_realtime_service(source: str = None) -> RealtimeQuotationService:
     """
-    获取实时行情服务单例
+    获取实时行情服务单例（线程安全）
     
     Args:
         source: 数据源，默认从 REALTIME_PROVIDERS 配置取第一个
     """
     from services.data_config import REALTIME_PROVIDERS
     
-    global _realtime_service
-    
     # 使用配置的第一个数据源作为默认
     if source is None:
         source = REALTIME_PROVIDERS[0] if REALTIME_PROVIDERS else 'sina'
     
-    if _realtime_service is None or _realtime_service.source != source:
-        _realtime_service = RealtimeQuotationService(source=source)
-    return _realtime_service
-
+    service = _realtime_services.get(source)
+    if service is not None:
+        return service
+    with _realtime_lock:
+        service = _realtime_services.get(source)
+        if service is None:
+            service = RealtimeQuotationService(source=source)
+            _realtime_services[source] = service
+        return service
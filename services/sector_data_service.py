@@ -1,6 +1,6 @@
 import akshare as ak
 import pandas as pd
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 import time
 from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 
@@ -12,43 +12,112 @@ logger = get_logger(__name__)
 class SectorDataService:
     """行业板块数据服务"""
 
+    # 进程级共享线程池（akshare 不支持超时参数，借助线程池实现超时与并发获取）
+    _EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix='sector')
+
+    def __init__(self, ttl: int = 5):
+        """
+        Args:
+            ttl: 板块数据缓存秒数
+        """
+        self._cache: Dict[Tuple[str, int], Tuple[float, List[Dict[str, Any]]]] = {}
+        self._ttl = ttl
+
+    def _get_cached(self, key: Tuple[str, int]) -> Optional[List[Dict[str, Any]]]:
+        """读取未过期的缓存"""
+        entry = self._cache.get(key)
+        if entry is not None and time.time() - entry[0] < self._ttl:
+            return entry[1]
+        return None
+
+    def _set_cached(self, key: Tuple[str, int], value: List[Dict[str, Any]]):
+        """写入缓存"""
+        self._cache[key] = (time.time(), value)
+
+    @staticmethod
+    def _format_top_boards(df: pd.DataFrame, limit: int) -> List[Dict[str, Any]]:
+        """按涨跌幅取前 limit 个板块，按列整体提取后组装为字典列表"""
+        top = df.sort_values(by='涨跌幅', ascending=False).head(limit)
+        n = len(top)
+
+        def column(name: str, default: Any, as_float: bool = False) -> list:
+            if name not in top.columns:
+                return [default] * n
+            col = top[name].astype(float) if as_float else top[name]
+            return col.tolist()
+
+        return [
+            {
+                "name": name,
+                "code": code,
+                "change_pct": change_pct,
+                "price": price,
+                "top_stock": top_stock,
+                "top_stock_change": top_stock_change,
+            }
+            for name, code, change_pct, price, top_stock, top_stock_change in zip(
+                top['板块名称'].tolist(),
+                top['板块代码'].tolist(),
+                top['涨跌幅'].astype(float).tolist(),
+                column('最新价', 0.0, as_float=True),
+                column('领涨股票', ""),
+                column('领涨股票-涨跌幅', 0.0, as_float=True),
+            )
+        ]
+
     def _fetch_sectors_with_timeout(self, timeout: int = 5) -> pd.DataFrame:
         """带超时的板块数据获取"""
-        with ThreadPoolExecutor(max_workers=1) as executor:
-            future = executor.submit(ak.stock_board_industry_name_em)
-            try:
-                return future.result(timeout=timeout)
-            except FuturesTimeoutError:
-                logger.warning(f"Sector fetch timed out after {timeout}s")
-                return pd.DataFrame()
-            except Exception as e:
-                logger.error(f"Error in sector fetch: {e}")
-                return pd.DataFrame()
+        future = self._EXECUTOR.submit(ak.stock_board_industry_name_em)
+        try:
+            return future.result(timeout=timeout)
+        except FuturesTimeoutError:
+            logger.warning(f"Sector fetch timed out after {timeout}s")
+            return pd.DataFrame()
+        except Exception as e:
+            logger.error(f"Error in sector fetch: {e}")
+            return pd.DataFrame()
+
+    def get_dashboard(self, limit: int = 10, timeout: int = 5) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        同时获取热门行业板块和热门概念板块
+
+        两者均为网络请求，概念板块在线程池中与行业板块并发获取；
+        概念板块在行业板块返回后最多再等待 timeout 秒，超时返回空列表
+
+        Returns:
+            {"sectors": [...], "concepts": [...]}
+        """
+        concepts_future = self._EXECUTOR.submit(self.get_hot_concepts, limit)
+        sectors = self.get_hot_sectors(limit)
+        try:
+            concepts = concepts_future.result(timeout=timeout)
+        except FuturesTimeoutError:
+            logger.warning(f"Hot concepts fetch timed out after {timeout}s")
+            concepts = []
+        except Exception as e:
+            logger.error(f"Error fetching hot concepts: {e}")
+            concepts = []
+        return {"sectors": sectors, "concepts": concepts}
 
     def get_hot_sectors(self, limit: int = 10) -> List[Dict[str, Any]]:
         """
         获取热门行业板块（按涨幅排序）
         如果API失败，返回模拟数据
         """
+        cache_key = ("hot_sectors", limit)
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
+
         try:
             logger.debug("Fetching hot sectors with timeout...")
             df = self._fetch_sectors_with_timeout(timeout=5)
             
             if df is not None and not df.empty and '涨跌幅' in df.columns:
-                df_sorted = df.sort_values(by='涨跌幅', ascending=False)
-                
-                sectors = []
-                for _, row in df_sorted.head(limit).iterrows():
-                    sectors.append({
-                        "name": row['板块名称'],
-                        "code": row['板块代码'],
-                        "change_pct": float(row['涨跌幅']),
-                        "price": float(row['最新价']) if '最新价' in row else 0.0,
-                        "top_stock": row['领涨股票'] if '领涨股票' in row else "",
-                        "top_stock_change": float(row['领涨股票-涨跌幅']) if '领涨股票-涨跌幅' in row else 0.0
-                    })
+                sectors = self._format_top_boards(df, limit)
                 
                 logger.debug(f"Successfully fetched {len(sectors)} hot sectors.")
+                self._set_cached(cache_key, sectors)
                 return sectors
         except Exception as e:
             logger.error(f"Error fetching hot sectors: {e}")
@@ -77,6 +146,11 @@ class SectorDataService:
         """
         获取热门概念板块
         """
+        cache_key = ("hot_concepts", limit)
+        cached = self._get_cached(cache_key)
+        if cached is not None:
+            return cached
+
         max_retries = 3
         for attempt in range(max_retries):
             try:
@@ -87,18 +161,8 @@ class SectorDataService:
                     continue
 
                 if '涨跌幅' in df.columns:
-                    df_sorted = df.sort_values(by='涨跌幅', ascending=False)
-                    
-                    sectors = []
-                    for _, row in df_sorted.head(limit).iterrows():
-                        sectors.append({
-                            "name": row['板块名称'],
-                            "code": row['板块代码'],
-                            "change_pct": float(row['涨跌幅']),
-                            "price": float(row['最新价']) if '最新价' in row else 0.0,
-                            "top_stock": row['领涨股票'] if '领涨股票' in row else "",
-                            "top_stock_change": float(row['领涨股票-涨跌幅']) if '领涨股票-涨跌幅' in row else 0.0
-                        })
+                    sectors = self._format_top_boards(df, limit)
+                    self._set_cached(cache_key, sectors)
                     return sectors
             except Exception as e:
                 logger.error(f"Error fetching hot concepts: {e}")
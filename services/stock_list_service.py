@@ -4,56 +4,176 @@ Stock List Service - Provides stock search functionality
 """
 
 import akshare as ak
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Optional
-from functools import lru_cache
+from typing import Callable, List, Dict, NamedTuple, Optional, Tuple
+from functools import lru_cache, partial
 import time
-import json
+import hashlib
 import os
+import threading
 
 from utils.logger import get_logger
+from utils.json_utils import json_loads, json_dumps, atomic_write_bytes
+
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = 'string[pyarrow]'
+except ImportError:
+    STRING_DTYPE = None
 
 logger = get_logger(__name__)
 
 
+class StockHit(NamedTuple):
+    """股票搜索/查询结果"""
+    code: str
+    name: str
+
+
 class StockListService:
     """股票列表服务，提供股票搜索和缓存功能"""
     
-    # 本地缓存文件路径
+    # 本地缓存文件路径（未压缩的 JSON，其他脚本也会直接读取该文件）
     CACHE_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'stock_list_cache.json')
+    # 安装了 zstandard 时改写压缩后的缓存文件（单独的扩展名，不占用 .json）
+    ZSTD_CACHE_FILE = CACHE_FILE + '.zst'
+    # 缓存文件格式版本: 2 = {"v": 2, "codes": [...], "names": [...]}（按列存储）
+    CACHE_VERSION = 2
+    # zstd 帧头魔数，用于识别早先以 zstd 压缩后写入 .json 的旧缓存文件
+    ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
     
     def __init__(self):
         self._stock_list: Optional[pd.DataFrame] = None
         self._last_update: float = 0
         self._cache_duration: int = 86400  # 内存缓存24小时
         self._file_cache_max_age: int = 86400  # 文件缓存最多24小时
+        # 搜索索引: (对应的股票列表, 小写名称数组, 小写代码数组, 带结果缓存的搜索函数)
+        self._search_index: Optional[Tuple[pd.DataFrame, np.ndarray, np.ndarray, Callable]] = None
+        # 代码索引: (对应的股票列表, {代码: 名称})
+        self._code_index: Optional[Tuple[pd.DataFrame, Dict[str, str]]] = None
+        # 后台刷新状态，同一时间最多一个刷新线程
+        self._refresh_lock = threading.Lock()
+        self._refresh_inflight = False
+    
+    def _cache_read_path(self) -> Optional[str]:
+        """读取时使用的缓存文件：优先 .zst（需安装 zstandard），否则回退到 .json；都不存在返回 None"""
+        if zstd is not None and os.path.exists(self.ZSTD_CACHE_FILE):
+            return self.ZSTD_CACHE_FILE
+        if os.path.exists(self.CACHE_FILE):
+            return self.CACHE_FILE
+        return None
     
-    def _is_cache_expired(self) -> bool:
+    def _is_cache_expired(self, path: Optional[str]) -> bool:
         """检查本地缓存文件是否过期（超过24小时）"""
-        if not os.path.exists(self.CACHE_FILE):
+        if path is None:
             return True
         try:
-            file_mtime = os.path.getmtime(self.CACHE_FILE)
+            file_mtime = os.path.getmtime(path)
             age = time.time() - file_mtime
             return age > self._file_cache_max_age
         except (OSError, IOError) as e:
             logger.warning(f"检查缓存文件失败: {e}")
             return True
     
+    def _write_cache_file(self, df: pd.DataFrame) -> bool:
+        """
+        按列写入本地缓存文件（两个平行数组，不逐行生成字典）
+        
+        安装了 zstandard 时以 zstd 压缩后写入 .zst 文件（名称以中文为主，压缩后约为原来的 1/3），
+        否则写入未压缩的 .json 文件；内容与上次写入相同时（比对旁路 .sha 文件中的摘要）只更新文件修改时间
+        
+        Returns:
+            是否实际重写了缓存文件
+        """
+        payload = json_dumps({
+            "v": self.CACHE_VERSION,
+            "codes": df['code'].tolist(),
+            "names": df['name'].tolist(),
+        })
+        path = self.CACHE_FILE
+        if zstd is not None:
+            payload = zstd.ZstdCompressor(level=3).compress(payload)
+            path = self.ZSTD_CACHE_FILE
+        digest = hashlib.blake2b(payload, digest_size=16).hexdigest()
+        sha_file = path + '.sha'
+        
+        if os.path.exists(path) and os.path.exists(sha_file):
+            with open(sha_file, 'r', encoding='utf-8') as f:
+                if f.read().strip() == digest:
+                    os.utime(path, None)  # 刷新修改时间，使过期检查通过
+                    return False
+        
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        atomic_write_bytes(path, payload)
+        atomic_write_bytes(sha_file, digest.encode('ascii'))
+        return True
+    
+    def _read_cache_file(self, path: str) -> Tuple[pd.DataFrame, bool]:
+        """
+        读取本地缓存文件
+        
+        Args:
+            path: 缓存文件路径（.zst 或 .json）
+        
+        Returns:
+            (股票列表, 是否为当前格式)；旧版按行存储的缓存仍可加载，但需重新生成
+        
+        Raises:
+            ValueError: 文件损坏，或为 zstd 压缩但未安装 zstandard
+        """
+        with open(path, 'rb') as f:
+            raw = f.read()
+        # .zst 文件一定是压缩的；.json 只有早先版本写入的旧文件可能是压缩的，按魔数识别
+        if path == self.ZSTD_CACHE_FILE or raw.startswith(self.ZSTD_MAGIC):
+            if zstd is None:
+                raise ValueError("缓存文件为 zstd 压缩格式，但未安装 zstandard")
+            try:
+                raw = zstd.ZstdDecompressor().decompress(raw)
+            except zstd.ZstdError as e:
+                raise ValueError(f"缓存文件解压失败: {e}") from e
+        data = json_loads(raw)
+        if isinstance(data, dict) and data.get("v") == self.CACHE_VERSION:
+            df = pd.DataFrame({'code': data['codes'], 'name': data['names']})
+            return self._compact_strings(df), True
+        return self._compact_strings(pd.DataFrame(data)), False
+    
+    @staticmethod
+    def _compact_strings(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        将 code/name 两列转为 Arrow 字符串存储（连续缓冲区，比逐个 Python str 对象省内存）
+        
+        未安装 pyarrow 时原样返回
+        """
+        if STRING_DTYPE is None:
+            return df
+        return df.astype({'code': STRING_DTYPE, 'name': STRING_DTYPE})
+    
     def _refresh_cache_async(self):
-        """异步刷新缓存（在后台更新，不阻塞主请求）"""
-        import threading
+        """异步刷新缓存（在后台更新，不阻塞主请求；已有刷新在进行时直接返回）"""
+        with self._refresh_lock:
+            if self._refresh_inflight:
+                return
+            self._refresh_inflight = True
+        
         def update():
             try:
                 logger.info("后台更新股票列表...")
                 df = ak.stock_info_a_code_name()
                 if 'code' in df.columns and 'name' in df.columns:
-                    os.makedirs(os.path.dirname(self.CACHE_FILE), exist_ok=True)
-                    with open(self.CACHE_FILE, 'w', encoding='utf-8') as f:
-                        json.dump(df[['code', 'name']].to_dict('records'), f, ensure_ascii=False)
-                    logger.info(f"股票列表后台更新完成，共 {len(df)} 只股票")
+                    if self._write_cache_file(df):
+                        logger.info(f"股票列表后台更新完成，共 {len(df)} 只股票")
+                    else:
+                        logger.info("股票列表无变化，仅刷新缓存时间")
             except Exception as e:
                 logger.warning(f"后台更新失败: {e}")
+            finally:
+                self._refresh_inflight = False
         
         thread = threading.Thread(target=update, daemon=True)
         thread.start()
@@ -70,15 +190,15 @@ class StockListService:
             return self._stock_list
         
         # 检查本地缓存是否过期
-        cache_expired = self._is_cache_expired()
+        cache_path = self._cache_read_path()
+        cache_expired = self._is_cache_expired(cache_path)
         
-        # 尝试从本地JSON文件加载（最快）
-        if os.path.exists(self.CACHE_FILE):
+        # 尝试从本地缓存文件加载（最快）
+        if cache_path is not None:
             try:
-                with open(self.CACHE_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                self._stock_list = pd.DataFrame(data)
+                self._stock_list, is_current = self._read_cache_file(cache_path)
                 self._last_update = current_time
+                cache_expired = cache_expired or not is_current
                 
                 if cache_expired:
                     logger.info(f"从本地缓存加载 {len(self._stock_list)} 只股票（缓存已过期，后台更新中...）")
@@ -87,7 +207,7 @@ class StockListService:
                     logger.debug(f"从本地缓存加载 {len(self._stock_list)} 只股票")
                 
                 return self._stock_list
-            except (IOError, json.JSONDecodeError) as e:
+            except (IOError, KeyError, ValueError) as e:  # JSONDecodeError 为 ValueError 子类
                 logger.warning(f"读取缓存文件失败: {e}")
         
         # 如果本地没有缓存，从网络获取
@@ -96,22 +216,22 @@ class StockListService:
             df = ak.stock_info_a_code_name()
             
             if 'code' in df.columns and 'name' in df.columns:
-                self._stock_list = df[['code', 'name']]
+                # 复制出两列，不再引用原始宽表，使其可被立即回收
+                self._stock_list = self._compact_strings(df[['code', 'name']].copy())
                 self._last_update = current_time
                 logger.info(f"股票列表已更新，共 {len(df)} 只股票")
                 
                 # 保存到本地缓存
                 try:
-                    os.makedirs(os.path.dirname(self.CACHE_FILE), exist_ok=True)
-                    with open(self.CACHE_FILE, 'w', encoding='utf-8') as f:
-                        json.dump(df[['code', 'name']].to_dict('records'), f, ensure_ascii=False)
+                    self._write_cache_file(self._stock_list)
                     logger.debug("股票列表已保存到本地缓存")
                 except IOError as e:
                     logger.warning(f"保存缓存失败: {e}")
             else:
                 if len(df.columns) >= 2:
-                    df.columns = ['code', 'name'] + list(df.columns[2:])
-                    self._stock_list = df[['code', 'name']]
+                    stock_list = df.iloc[:, :2].copy()
+                    stock_list.columns = ['code', 'name']
+                    self._stock_list = self._compact_strings(stock_list)
                     self._last_update = current_time
                     
         except Exception as e:
@@ -124,12 +244,32 @@ class StockListService:
         return self._stock_list
 
     
+    def _get_search_index(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray, Callable]:
+        """获取小写化的名称/代码数组及绑定在其上的搜索函数（股票列表重新加载后自动重建）"""
+        index = self._search_index
+        if index is None or index[0] is not df:
+            names = df['name'].astype(str).str.lower().to_numpy(dtype=str)
+            codes = df['code'].astype(str).str.lower().to_numpy(dtype=str)
+            # 结果缓存随索引一起创建，股票列表更新后旧结果随旧索引一起丢弃
+            search = lru_cache(maxsize=512)(partial(self._search, df, names, codes))
+            index = (df, names, codes, search)
+            self._search_index = index
+        return index
+    
+    def _get_code_index(self, df: pd.DataFrame) -> Dict[str, str]:
+        """获取 {代码: 名称} 索引（股票列表重新加载后自动重建）"""
+        index = self._code_index
+        if index is None or index[0] is not df:
+            index = (df, dict(zip(df['code'].to_numpy(), df['name'].to_numpy())))
+            self._code_index = index
+        return index[1]
+    
     def search_by_name(self, query: str, limit: int = 10) -> List[Dict[str, str]]:
         """
         按名称或代码模糊搜索股票
         
         参数:
-            query: 搜索关键词（股票名称或代码的一部分）
+            query: 搜索关键词（股票名称或代码的一部分，纯数字按代码前缀匹配）
             limit: 返回结果数量限制
             
         返回:
@@ -143,27 +283,35 @@ class StockListService:
         if df.empty:
             return []
         
-        query = query.strip()
+        search = self._get_search_index(df)[3]
+        hits = search(query.strip().lower(), limit)
         
-        # 同时搜索代码和名称
-        # 注意：使用case=False进行大小写不敏感搜索
-        mask = (
-            df['name'].str.contains(query, case=False, na=False) |
-            df['code'].str.contains(query, case=False, na=False)
-        )
+        # 在接口边界转换为字典列表（FastAPI 会把元组序列化为数组）
+        return [hit._asdict() for hit in hits]
+    
+    @staticmethod
+    def _search(df: pd.DataFrame, names: np.ndarray, codes: np.ndarray,
+                query: str, limit: int) -> Tuple[StockHit, ...]:
+        """
+        在给定的搜索索引上执行搜索（由 _get_search_index 绑定索引并包装结果缓存）
         
-        results = df[mask].head(limit)
+        返回:
+            (StockHit, ...)
+        """
+        if query.isdigit():
+            # 纯数字视为代码前缀查询，只匹配代码列
+            mask = np.char.startswith(codes, query)
+        else:
+            # 同时搜索代码和名称（在预先小写化的数组上做子串匹配，大小写不敏感）
+            mask = (np.char.find(names, query) >= 0) | (np.char.find(codes, query) >= 0)
         
-        # 转换为字典列表
-        return [
-            {
-                "code": str(row['code']),
-                "name": str(row['name'])
-            }
-            for _, row in results.iterrows()
-        ]
+        results = df[mask].head(limit)
+        return tuple(
+            StockHit(str(code), str(name))
+            for code, name in zip(results['code'].to_numpy(), results['name'].to_numpy())
+        )
     
-    def get_stock_info(self, code: str) -> Optional[Dict[str, str]]:
+    def get_stock_info(self, code: str) -> Optional[StockHit]:
         """
         根据代码获取股票信息
         
@@ -171,23 +319,13 @@ class StockListService:
             code: 股票代码
             
         返回:
-            股票信息字典，包含code和name，如果未找到返回None
+            StockHit(code, name)，需要字典时用 _asdict()；如果未找到返回None
         """
-        df = self.get_stock_list()
-        
-        if df.empty:
+        name = self._get_code_index(self.get_stock_list()).get(code)
+        if name is None:
             return None
         
-        result = df[df['code'] == code]
-        
-        if result.empty:
-            return None
-        
-        row = result.iloc[0]
-        return {
-            "code": str(row['code']),
-            "name": str(row['name'])
-        }
+        return StockHit(code, str(name))
     
     def get_stock_name(self, code: str) -> Optional[str]:
         """
@@ -199,5 +337,22 @@ class StockListService:
         返回:
             股票名称，如果未找到返回None
         """
-        info = self.get_stock_info(code)
-        return info['name'] if info else None
+        name = self._get_code_index(self.get_stock_list()).get(code)
+        return None if name is None else str(name)
+
+
+# 全局单例（各路由共享已加载的股票列表与搜索索引）
+_stock_list_service: Optional[StockListService] = None
+_stock_list_lock = threading.Lock()
+
+
+def get_stock_list_service() -> StockListService:
+    """获取股票列表服务单例（线程安全）"""
+    global _stock_list_service
+    service = _stock_list_service
+    if service is not None:
+        return service
+    with _stock_list_lock:
+        if _stock_list_service is None:
+            _stock_list_service = StockListService()
+        return _stock_list_service
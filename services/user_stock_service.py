@@ -1,25 +1,41 @@
 import json
 import os
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Tuple
 
 from utils.logger import get_logger
+from utils.json_utils import read_json_file, write_json_file, json_loads, json_dumps
 from services.market_data_service import MarketDataService
 
+try:
+    from settings import DEBUG_PRETTY_JSON
+except ImportError:
+    DEBUG_PRETTY_JSON = False
+
 logger = get_logger(__name__)
 
 
 class UserStockService:
-    """用户股票分组管理服务"""
+    """
+    用户股票分组管理服务
+    
+    存储方式: JSON 快照 + 追加写的操作日志（每次增删只追加一行），
+    日志超过 COMPACT_THRESHOLD 行时合并回快照并清空日志
+    """
+    
+    COMPACT_THRESHOLD = 200
     
     def __init__(self, data_file: str = "data/user_stocks.json"):
         self.data_file = data_file
+        self.log_file = os.path.splitext(data_file)[0] + ".log"
         self.market_service = MarketDataService()
+        # 解析结果缓存，以快照和日志文件的 (修改时间, 大小) 为键；本进程写入后同步更新
+        self._cache: Optional[Dict[str, List[str]]] = None
+        self._cache_key: Optional[Tuple] = None
         self._ensure_data_file()
 
     def _ensure_data_file(self):
         """确保数据文件存在"""
-        if not os.path.exists("data"):
-            os.makedirs("data")
+        os.makedirs(os.path.dirname(self.data_file) or ".", exist_ok=True)
         
         if not os.path.exists(self.data_file):
             initial_data = {
@@ -27,25 +43,126 @@ class UserStockService:
                 "holdings": [],  # 持有股
                 "watching": []   # 观测股
             }
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(initial_data, f, ensure_ascii=False, indent=2)
+            write_json_file(self.data_file, initial_data, indent=DEBUG_PRETTY_JSON)
 
-    def _read_data(self) -> Dict[str, List[str]]:
-        """读取数据"""
+    def _file_state(self) -> Tuple:
+        """快照与日志文件的 (修改时间, 大小)，用于判断缓存是否失效"""
+        state = []
+        for path in (self.data_file, self.log_file):
+            try:
+                st = os.stat(path)
+                state.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                state.append(None)
+        return tuple(state)
+
+    @staticmethod
+    def _to_lists(groups: Dict[str, Dict[str, None]]) -> Dict[str, List[str]]:
+        """内部分组模型转换为 {分组: [代码, ...]}"""
+        return {group: list(codes) for group, codes in groups.items()}
+
+    def _load_groups(self) -> Dict[str, Dict[str, None]]:
+        """
+        加载分组数据（快照 + 回放操作日志，文件未变化时直接返回缓存）
+        
+        每个分组以保持插入顺序的 dict 作为有序集合，成员判断与增删均为 O(1)；
+        返回的是缓存本身，调用方不得修改
+        """
+        state = self._file_state()
+        if self._cache is not None and state == self._cache_key:
+            return self._cache
+        
         try:
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            data = read_json_file(self.data_file)
         except (IOError, json.JSONDecodeError) as e:
             logger.error(f"Error reading user stocks: {e}")
-            return {"favorites": [], "holdings": [], "watching": []}
+            return {"favorites": {}, "holdings": {}, "watching": {}}
+        
+        groups = {group: dict.fromkeys(codes) for group, codes in data.items()}
+        op_count = self._replay_log(groups)
+        if op_count > self.COMPACT_THRESHOLD:
+            self._save_data(groups)
+        else:
+            self._cache, self._cache_key = groups, state
+        return groups
+
+    def _read_data(self) -> Dict[str, List[str]]:
+        """读取数据 {分组: [代码, ...]}"""
+        return self._to_lists(self._load_groups())
+
+    @staticmethod
+    def _apply_op(groups: Dict[str, Dict[str, None]], op: str, group: str, code: str):
+        """应用一条增删操作（可重复应用）"""
+        stocks = groups.setdefault(group, {})
+        if op == "add":
+            stocks.setdefault(code, None)
+        else:
+            stocks.pop(code, None)
 
-    def _save_data(self, data: Dict[str, List[str]]):
-        """保存数据"""
+    def _replay_log(self, groups: Dict[str, Dict[str, None]]) -> int:
+        """将操作日志依次应用到分组数据上，返回日志行数"""
+        if not os.path.exists(self.log_file):
+            return 0
+        
+        count = 0
         try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            with open(self.log_file, 'rb') as f:
+                for line in f:
+                    count += 1
+                    try:
+                        entry = json_loads(line)
+                        self._apply_op(groups, entry["op"], entry["g"], entry["c"])
+                    except (ValueError, KeyError, TypeError, AttributeError):
+                        continue  # 忽略写入中断产生的残行
+        except IOError as e:
+            logger.error(f"Error reading user stocks log: {e}")
+        return count
+
+    def _append_log(self, op: str, group: str, code: str):
+        """追加一条操作日志"""
+        record = json_dumps({"op": op, "g": group, "c": code}) + b"\n"
+        cache_valid = self._cache is not None and self._file_state() == self._cache_key
+        try:
+            with open(self.log_file, 'a+b') as f:
+                # 上次写入中断留下的残行不能与新记录连在一起
+                if f.seek(0, os.SEEK_END) > 0:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        record = b"\n" + record
+                f.write(record)
+        except IOError as e:
+            logger.error(f"Error saving user stocks: {e}")
+            self._cache = None
+            return
+        
+        # 同步更新缓存，避免下次读取重新解析
+        if cache_valid:
+            self._apply_op(self._cache, op, group, code)
+            self._cache_key = self._file_state()
+        else:
+            self._cache = None
+
+    def _save_data(self, groups: Dict[str, Dict[str, None]]):
+        """保存完整快照并清空操作日志（日志中的操作均可重复应用，快照写入后中断也不会出错）"""
+        try:
+            write_json_file(self.data_file, self._to_lists(groups), indent=DEBUG_PRETTY_JSON)
+            if os.path.exists(self.log_file):
+                open(self.log_file, 'wb').close()
+            self._cache, self._cache_key = groups, self._file_state()
         except IOError as e:
             logger.error(f"Error saving user stocks: {e}")
+            self._cache = None
+
+    def is_in_group(self, group: str, code: str) -> bool:
+        """判断股票是否在分组中"""
+        return code in self._load_groups().get(group, {})
+
+    def get_all_codes(self) -> List[str]:
+        """所有分组中的股票代码（去重，保持首次出现的顺序，已包含尚未合并的操作日志）"""
+        codes: Dict[str, None] = {}
+        for stocks in self._load_groups().values():
+            codes.update(stocks)
+        return list(codes)
 
     def get_stocks(self) -> Dict[str, List[Dict[str, Any]]]:
         """获取所有分组的股票列表（包含实时行情）"""
@@ -84,10 +201,8 @@ class UserStockService:
         if group not in ["favorites", "holdings", "watching"]:
             return False
             
-        data = self._read_data()
-        if code not in data[group]:
-            data[group].append(code)
-            self._save_data(data)
+        if code not in self._load_groups()[group]:
+            self._append_log("add", group, code)
             return True
         return False
 
@@ -96,9 +211,7 @@ class UserStockService:
         if group not in ["favorites", "holdings", "watching"]:
             return False
             
-        data = self._read_data()
-        if code in data[group]:
-            data[group].remove(code)
-            self._save_data(data)
+        if code in self._load_groups()[group]:
+            self._append_log("remove", group, code)
             return True
         return False
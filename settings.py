@@ -32,6 +32,8 @@ SQLITE_DB_PATH = os.getenv("SQLITE_DB_PATH", str(DATA_DIR / "stock_data.db"))
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 LOG_FILE = os.getenv("LOG_FILE", str(LOG_DIR / "app.log"))
 LOG_FORMAT = "%(asctime)s | %(levelname)-8s | %(name)s | %(message)s"
+# DEBUG 级别时文件日志附带函数名和行号
+LOG_DEBUG_FORMAT = "%(asctime)s | %(levelname)-8s | %(name)s | %(funcName)s:%(lineno)d | %(message)s"
 LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 
@@ -57,6 +59,9 @@ AFTERNOON_END = "15:00"
 # 最少需要的历史数据天数
 MIN_DATA_DAYS = 60
 
+# 用户数据 JSON 是否缩进输出（调试用，默认紧凑格式）
+DEBUG_PRETTY_JSON = os.getenv("DEBUG_PRETTY_JSON", "").lower() in ("1", "true", "yes")
+
 
 # ==================== API 配置 ====================
 # 行情缓存时间（秒）
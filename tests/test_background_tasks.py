@@ -7,14 +7,14 @@ import threading
 import time
 from unittest.mock import Mock, patch
 
+from services.background_tasks import BackgroundTaskQueue, TaskPriority
+
 
 class TestBackgroundTaskQueue:
     """后台任务队列测试"""
     
     def test_queue_creation(self):
         """测试队列创建"""
-        from services.background_tasks import BackgroundTaskQueue, TaskPriority
-        
         queue = BackgroundTaskQueue(num_workers=1)
         
         assert queue._num_workers == 1
@@ -25,8 +25,6 @@ class TestBackgroundTaskQueue:
     
     def test_task_submission(self):
         """测试任务提交"""
-        from services.background_tasks import BackgroundTaskQueue, TaskPriority
-        
         queue = BackgroundTaskQueue(num_workers=1)
         result = []
         
@@ -41,13 +39,11 @@ class TestBackgroundTaskQueue:
     
     def test_task_deduplication(self):
         """测试任务去重"""
-        from services.background_tasks import BackgroundTaskQueue, TaskPriority
-        
         queue = BackgroundTaskQueue(num_workers=1)
         counter = [0]
         
         def slow_task():
-            time.sleep(0.2)
+            time.sleep(0.02)
             counter[0] += 1
         
         # 提交相同任务 3 次
@@ -63,8 +59,6 @@ class TestBackgroundTaskQueue:
     
     def test_priority_ordering(self):
         """测试优先级排序"""
-        from services.background_tasks import BackgroundTaskQueue, TaskPriority
-        
         queue = BackgroundTaskQueue(num_workers=1)
         execution_order = []
         
@@ -87,8 +81,6 @@ class TestBackgroundTaskQueue:
     
     def test_stats(self):
         """测试统计信息"""
-        from services.background_tasks import BackgroundTaskQueue
-        
         queue = BackgroundTaskQueue(num_workers=1)
         
         queue.submit(lambda: None, task_name="task1")
@@ -101,6 +93,19 @@ class TestBackgroundTaskQueue:
         assert stats["failed"] >= 1
         
         queue.shutdown()
+    
+    def test_wait_completion_after_shutdown(self):
+        """测试关闭后（工作线程已退出）wait_completion 不会阻塞"""
+        queue = BackgroundTaskQueue(num_workers=2)
+        queue.shutdown()
+        queue.shutdown()  # 工作线程已退出，唤醒标记无人取走
+        
+        waiter = threading.Thread(target=queue.wait_completion, daemon=True)
+        waiter.start()
+        waiter.join(timeout=2)
+        
+        assert not waiter.is_alive()
+        assert queue.queue_size == 0
 
 
 class TestDataFetcher:
@@ -142,8 +147,6 @@ class TestTaskPriority:
     
     def test_priority_values(self):
         """测试优先级值"""
-        from services.background_tasks import TaskPriority
-        
         assert TaskPriority.HIGH < TaskPriority.NORMAL
         assert TaskPriority.NORMAL < TaskPriority.LOW
         assert TaskPriority.HIGH == 1
@@ -4,8 +4,8 @@ fallback 模块单元测试
 """
 
 import pytest
-import time
 from typing import Optional
+import services.fallback as fallback
 from services.fallback import FallbackExecutor, with_retry, rate_limited
 
 
@@ -128,19 +128,47 @@ class TestWithRetry:
 class TestRateLimited:
     """测试 rate_limited 装饰器"""
     
-    def test_rate_limit_delay(self):
-        """限流延迟"""
+    @pytest.fixture
+    def fake_clock(self, monkeypatch):
+        """替换限流用的时钟与 sleep，返回 (设置时钟读数的函数, sleep 调用记录)"""
+        sleeps = []
+        
+        def set_ticks(*ticks):
+            it = iter(ticks)
+            monkeypatch.setattr(fallback, "_now", lambda: next(it))
+        
+        monkeypatch.setattr(fallback.time, "sleep", sleeps.append)
+        return set_ticks, sleeps
+    
+    def test_rate_limit_delay(self, fake_clock):
+        """间隔不足时补足剩余时间"""
+        set_ticks, sleeps = fake_clock
+        
+        @rate_limited(delay=0.1)
+        def quick_func():
+            return "ok"
+        
+        # 第一次调用: 检查 0.0、结束 0.0；第二次调用: 检查 0.03、结束 0.1
+        set_ticks(0.0, 0.0, 0.03, 0.1)
+        assert quick_func() == "ok"
+        assert quick_func() == "ok"
+        
+        # 第一次调用不等待，第二次补足剩余的 0.07 秒
+        assert sleeps == [pytest.approx(0.07)]
+    
+    def test_rate_limit_no_delay_after_interval(self, fake_clock):
+        """间隔已足够时不等待"""
+        set_ticks, sleeps = fake_clock
+        
         @rate_limited(delay=0.1)
         def quick_func():
-            return time.time()
+            return "ok"
         
-        start = time.time()
+        set_ticks(0.0, 0.0, 0.5, 0.5)
         quick_func()
         quick_func()
-        end = time.time()
         
-        # 两次调用应该至少间隔 0.1 秒
-        assert end - start >= 0.1
+        assert sleeps == []
 
 
 if __name__ == "__main__":
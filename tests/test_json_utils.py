@@ -0,0 +1,67 @@
+"""
+json_utils 单元测试
+测试 JSON 序列化工具函数（含未安装 orjson 时的回退）
+"""
+
+import json
+
+import pytest
+import utils.json_utils as json_utils
+from utils.json_utils import json_loads, json_dumps, read_json_file, write_json_file
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def backend(request, monkeypatch):
+    """分别在 orjson 与标准库 json 下运行"""
+    if request.param == "stdlib":
+        monkeypatch.setattr(json_utils, "orjson", None)
+    elif json_utils.orjson is None:
+        pytest.skip("orjson 未安装")
+    return request.param
+
+
+class TestJsonUtils:
+    """测试 json_loads / json_dumps"""
+
+    def test_round_trip(self, backend):
+        """序列化后可还原"""
+        data = {"favorites": ["600519", "000001"], "name": "贵州茅台"}
+        assert json_loads(json_dumps(data)) == data
+
+    def test_dumps_returns_utf8_bytes(self, backend):
+        """输出为 UTF-8 字节串，中文不转义"""
+        raw = json_dumps({"name": "贵州茅台"})
+        assert isinstance(raw, bytes)
+        assert "贵州茅台".encode("utf-8") in raw
+
+    def test_indent(self, backend):
+        """缩进输出"""
+        assert b"\n  " in json_dumps({"a": [1]}, indent=True)
+        assert b"\n" not in json_dumps({"a": [1]})
+
+    def test_loads_accepts_str(self, backend):
+        """支持字符串输入"""
+        assert json_loads('{"a": 1}') == {"a": 1}
+
+    def test_invalid_json(self, backend):
+        """格式错误抛出 json.JSONDecodeError"""
+        with pytest.raises(json.JSONDecodeError):
+            json_loads(b"{bad")
+
+
+class TestJsonFile:
+    """测试 JSON 文件读写"""
+
+    def test_write_then_read(self, tmp_path, backend):
+        """写入后可读回，且不残留临时文件"""
+        path = tmp_path / "data.json"
+        write_json_file(path, {"codes": ["600519"]}, indent=True)
+        assert read_json_file(path) == {"codes": ["600519"]}
+        assert [p.name for p in tmp_path.iterdir()] == ["data.json"]
+
+    def test_overwrite(self, tmp_path, backend):
+        """覆盖已有文件"""
+        path = tmp_path / "data.json"
+        write_json_file(path, [1])
+        write_json_file(path, [2])
+        assert read_json_file(path) == [2]
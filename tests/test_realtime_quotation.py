@@ -26,12 +26,13 @@ def test_realtime_quotation_service():
     
     # 测试单只股票
     print("\n1.1 获取单只股票 (600519 贵州茅台):")
-    data = service.get_realtime('600519')
-    if data and '600519' in data:
-        quote = data['600519']
-        print(f"   名称: {quote.get('name')}")
-        print(f"   现价: {quote.get('now')}")
-        print(f"   涨跌幅: {((quote.get('now', 0) - quote.get('close', 0)) / quote.get('close', 1) * 100):.2f}%")
+    df = service.get_realtime_df('600519')
+    if not df.empty and '600519' in df['code'].values:
+        quote = df.set_index('code').loc['600519']
+        change_pct = (quote['now'] - quote['close']) / quote['close'] * 100
+        print(f"   名称: {quote['name']}")
+        print(f"   现价: {quote['now']}")
+        print(f"   涨跌幅: {change_pct:.2f}%")
         print("   ✅ 单只股票测试通过")
     else:
         print("   ⚠️ 获取数据失败（可能是非交易时段）")
@@ -39,12 +40,12 @@ def test_realtime_quotation_service():
     # 测试多只股票
     print("\n1.2 获取多只股票 (600519, 000001, 300750):")
     stocks = ['600519', '000001', '300750']
-    data = service.get_realtime(stocks)
-    if data:
-        for code in stocks:
-            if code in data:
-                quote = data[code]
-                print(f"   {quote.get('name')} ({code}): {quote.get('now')}")
+    df = service.get_realtime_df(stocks)
+    if not df.empty:
+        # 整列计算涨跌幅
+        df['change_pct'] = (df['now'] - df['close']) / df['close'] * 100
+        for row in df.itertuples(index=False):
+            print(f"   {row.name} ({row.code}): {row.now} ({row.change_pct:.2f}%)")
         print("   ✅ 多只股票测试通过")
     else:
         print("   ⚠️ 获取数据失败")
@@ -0,0 +1,156 @@
+"""
+股票列表服务单元测试
+测试本地缓存文件的读写（按列格式、旧版按行格式、摘要比对、zstd 压缩）和股票搜索
+"""
+
+import json
+import os
+
+import pandas as pd
+import pytest
+
+stock_list_service = pytest.importorskip("services.stock_list_service")
+StockListService = stock_list_service.StockListService
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    """缓存文件指向临时目录的服务实例"""
+    cache_file = str(tmp_path / "stock_list_cache.json")
+    monkeypatch.setattr(StockListService, "CACHE_FILE", cache_file)
+    monkeypatch.setattr(StockListService, "ZSTD_CACHE_FILE", cache_file + ".zst")
+    return StockListService()
+
+
+@pytest.fixture
+def no_zstd(monkeypatch):
+    """模拟未安装 zstandard"""
+    monkeypatch.setattr(stock_list_service, "zstd", None)
+
+
+def make_df():
+    return pd.DataFrame({"code": ["600519", "000001"], "name": ["贵州茅台", "平安银行"]})
+
+
+def records(df):
+    return [(str(c), str(n)) for c, n in zip(df["code"], df["name"])]
+
+
+class TestCacheFile:
+    """测试缓存文件读写"""
+
+    def test_columnar_round_trip(self, service, no_zstd):
+        """未安装 zstandard 时写入按列存储的 .json 文件并可读回"""
+        assert service._write_cache_file(make_df())
+
+        with open(service.CACHE_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        assert data == {"v": 2, "codes": ["600519", "000001"], "names": ["贵州茅台", "平安银行"]}
+
+        path = service._cache_read_path()
+        assert path == service.CACHE_FILE
+        df, is_current = service._read_cache_file(path)
+        assert is_current
+        assert records(df) == records(make_df())
+
+    def test_legacy_record_list(self, service, no_zstd):
+        """旧版按行存储的缓存仍可读取，但标记为需要重新生成"""
+        with open(service.CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump([{"code": "600519", "name": "贵州茅台"}], f, ensure_ascii=False)
+
+        df, is_current = service._read_cache_file(service._cache_read_path())
+        assert not is_current
+        assert records(df) == [("600519", "贵州茅台")]
+
+    def test_unchanged_content_skips_rewrite(self, service, no_zstd):
+        """内容与 .sha 摘要一致时不重写文件，只刷新修改时间"""
+        assert service._write_cache_file(make_df())
+        os.utime(service.CACHE_FILE, (0, 0))
+
+        assert not service._write_cache_file(make_df())
+        assert not service._is_cache_expired(service.CACHE_FILE)
+
+        changed = pd.DataFrame({"code": ["600519"], "name": ["贵州茅台"]})
+        assert service._write_cache_file(changed)
+        df, _ = service._read_cache_file(service.CACHE_FILE)
+        assert records(df) == [("600519", "贵州茅台")]
+
+    def test_missing_cache(self, service):
+        """没有缓存文件时视为已过期"""
+        assert service._cache_read_path() is None
+        assert service._is_cache_expired(None)
+
+    def test_zstd_file(self, service):
+        """安装了 zstandard 时写入单独的 .zst 文件，读取时优先于旧版 .json"""
+        pytest.importorskip("zstandard")
+        with open(service.CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump([{"code": "000001", "name": "平安银行"}], f, ensure_ascii=False)
+        assert service._cache_read_path() == service.CACHE_FILE
+
+        assert service._write_cache_file(make_df())
+        assert os.path.exists(service.ZSTD_CACHE_FILE + ".sha")
+        with open(service.ZSTD_CACHE_FILE, "rb") as f:
+            assert f.read(4) == StockListService.ZSTD_MAGIC
+
+        path = service._cache_read_path()
+        assert path == service.ZSTD_CACHE_FILE
+        df, is_current = service._read_cache_file(path)
+        assert is_current
+        assert records(df) == records(make_df())
+
+    def test_zstd_file_without_zstandard(self, service, no_zstd):
+        """未安装 zstandard 时忽略 .zst 文件，回退读取 .json"""
+        with open(service.ZSTD_CACHE_FILE, "wb") as f:
+            f.write(StockListService.ZSTD_MAGIC)
+        assert service._cache_read_path() is None
+
+        service._write_cache_file(make_df())
+        assert service._cache_read_path() == service.CACHE_FILE
+
+
+class TestSearch:
+    """测试 search_by_name（纯数字按代码前缀匹配，其他按名称/代码子串匹配）"""
+
+    @pytest.fixture
+    def loaded(self, service, monkeypatch):
+        df = pd.DataFrame({
+            "code": ["600519", "000001", "300519", "600000"],
+            "name": ["贵州茅台", "平安银行", "*ST新光", "浦发银行"],
+        })
+        monkeypatch.setattr(service, "get_stock_list", lambda: df)
+        return service
+
+    def codes(self, hits):
+        return [hit["code"] for hit in hits]
+
+    def test_digit_query_is_code_prefix(self, loaded):
+        """纯数字只匹配代码前缀，不匹配代码中间的子串"""
+        assert self.codes(loaded.search_by_name("600")) == ["600519", "600000"]
+        assert loaded.search_by_name("519") == []
+
+    def test_name_substring(self, loaded):
+        """非纯数字按名称子串匹配"""
+        assert self.codes(loaded.search_by_name("银行")) == ["000001", "600000"]
+        assert self.codes(loaded.search_by_name(" 茅台 ")) == ["600519"]
+
+    def test_regex_characters_are_literal(self, loaded):
+        """正则特殊字符按字面匹配，大小写不敏感"""
+        assert self.codes(loaded.search_by_name("*ST")) == ["300519"]
+        assert self.codes(loaded.search_by_name("*st")) == ["300519"]
+        assert loaded.search_by_name(".*") == []
+
+    def test_limit_and_empty_query(self, loaded):
+        """结果数量受 limit 限制，空查询返回空列表"""
+        assert len(loaded.search_by_name("银行", limit=1)) == 1
+        assert loaded.search_by_name("") == []
+
+    def test_results_follow_reloaded_list(self, loaded, monkeypatch):
+        """股票列表重新加载后不返回旧列表的缓存结果"""
+        assert self.codes(loaded.search_by_name("茅台")) == ["600519"]
+        reloaded = pd.DataFrame({"code": ["600520"], "name": ["茅台新"]})
+        monkeypatch.setattr(loaded, "get_stock_list", lambda: reloaded)
+        assert loaded.search_by_name("茅台") == [{"code": "600520", "name": "茅台新"}]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -6,10 +6,13 @@ stock_utils 单元测试
 import pytest
 from utils.stock_utils import (
     get_stock_type,
+    get_stock_type_batch,
     format_stock_code,
     validate_stock_code,
     is_index_code,
     format_hk_code,
+    quotes_to_dataframe,
+    QUOTE_COLUMNS,
 )
 
 
@@ -45,6 +48,7 @@ class TestGetStockType:
         assert get_stock_type("sh600519") == "sh"
         assert get_stock_type("sz000001") == "sz"
         assert get_stock_type("bj430047") == "bj"
+        assert get_stock_type("SH600519") == "sh"  # 大写前缀
     
     def test_empty_code(self):
         """空代码"""
@@ -52,6 +56,21 @@ class TestGetStockType:
         assert get_stock_type(None) is not None  # 不应崩溃
 
 
+class TestGetStockTypeBatch:
+    """测试 get_stock_type_batch 函数"""
+    
+    def test_matches_scalar(self):
+        """与逐个判断结果一致"""
+        codes = ["600519", "688111", "000001", "300750", "430047", "830946",
+                 "920001", "110059", "204001", "sh600519", "bj430047", ""]
+        result = get_stock_type_batch(codes)
+        assert result.tolist() == [get_stock_type(c) for c in codes]
+    
+    def test_empty_input(self):
+        """空输入"""
+        assert get_stock_type_batch([]).shape == (0,)
+
+
 class TestFormatStockCode:
     """测试 format_stock_code 函数"""
     
@@ -134,5 +153,29 @@ class TestFormatHkCode:
         assert format_hk_code("HK9988") == "09988"
 
 
+class TestQuotesToDataframe:
+    """测试 quotes_to_dataframe 函数"""
+    
+    def test_basic(self):
+        """每只股票一行，可整列计算"""
+        quotes = {
+            "600519": {"name": "贵州茅台", "now": 110.0, "close": 100.0, "open": 101.0,
+                       "high": 111.0, "low": 99.0, "volume": 1000, "amount": 1e5},
+            "000001": {"name": "平安银行", "now": 9.0, "close": 10.0, "open": 10.0,
+                       "high": 10.0, "low": 9.0, "volume": 2000},
+        }
+        df = quotes_to_dataframe(quotes)
+        assert list(df.columns) == list(QUOTE_COLUMNS)
+        assert df["code"].tolist() == ["600519", "000001"]
+        change_pct = (df["now"] - df["close"]) / df["close"] * 100
+        assert change_pct.round(2).tolist() == [10.0, -10.0]
+    
+    def test_empty(self):
+        """空行情"""
+        df = quotes_to_dataframe({})
+        assert df.empty
+        assert list(df.columns) == list(QUOTE_COLUMNS)
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,111 @@
+"""
+用户股票分组服务单元测试
+测试 JSON 快照 + 操作日志的存储方式（增删回放、日志合并、残行处理）
+"""
+
+import json
+
+import pytest
+
+user_stock_service = pytest.importorskip("services.user_stock_service")
+UserStockService = user_stock_service.UserStockService
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    """临时快照文件路径（日志文件与之同名，扩展名为 .log）"""
+    return str(tmp_path / "user_stocks.json")
+
+
+class TestOperationLog:
+    """测试增删操作写入日志并在新实例中回放"""
+
+    def test_add_remove_replay(self, data_file):
+        """一个实例写入的增删，另一个实例读取时可见"""
+        service = UserStockService(data_file)
+        assert service.add_stock("favorites", "600519")
+        assert service.add_stock("favorites", "000001")
+        assert service.add_stock("holdings", "600519")
+        assert service.remove_stock("favorites", "000001")
+
+        other = UserStockService(data_file)
+        data = other._read_data()
+        assert data["favorites"] == ["600519"]
+        assert data["holdings"] == ["600519"]
+        assert data["watching"] == []
+        assert other.get_all_codes() == ["600519"]
+
+    def test_duplicate_and_missing(self, data_file):
+        """重复添加、删除不存在的股票、未知分组均返回 False 且不写日志"""
+        service = UserStockService(data_file)
+        assert service.add_stock("favorites", "600519")
+        assert not service.add_stock("favorites", "600519")
+        assert not service.remove_stock("watching", "600519")
+        assert not service.add_stock("unknown", "600519")
+
+        with open(service.log_file, "rb") as f:
+            assert len(f.read().splitlines()) == 1
+
+    def test_sees_writes_from_other_instance(self, data_file):
+        """已缓存的实例能看到另一个实例之后追加的操作"""
+        reader = UserStockService(data_file)
+        assert reader._read_data()["watching"] == []
+
+        UserStockService(data_file).add_stock("watching", "000858")
+        assert reader.is_in_group("watching", "000858")
+
+
+class TestCompaction:
+    """测试日志超过阈值后合并回快照"""
+
+    def test_compaction_truncates_log(self, data_file, monkeypatch):
+        """日志行数超过阈值时写入快照并清空日志"""
+        monkeypatch.setattr(UserStockService, "COMPACT_THRESHOLD", 3)
+        writer = UserStockService(data_file)
+        for code in ("600519", "000001", "000858", "601398"):
+            writer.add_stock("favorites", code)
+        writer.remove_stock("favorites", "000001")
+
+        reader = UserStockService(data_file)
+        expected = ["600519", "000858", "601398"]
+        assert reader._read_data()["favorites"] == expected
+
+        with open(reader.log_file, "rb") as f:
+            assert f.read() == b""
+        with open(data_file, "r", encoding="utf-8") as f:
+            assert json.load(f)["favorites"] == expected
+
+        # 合并后继续追加，新实例读取结果一致
+        reader.add_stock("holdings", "002594")
+        assert UserStockService(data_file)._read_data()["holdings"] == ["002594"]
+
+    def test_below_threshold_keeps_log(self, data_file):
+        """未超过阈值时快照不变，操作只在日志中"""
+        service = UserStockService(data_file)
+        service.add_stock("favorites", "600519")
+        UserStockService(data_file)._read_data()
+
+        with open(data_file, "r", encoding="utf-8") as f:
+            assert json.load(f)["favorites"] == []
+
+
+class TestTruncatedLine:
+    """测试写入中断留下的残行"""
+
+    def test_truncated_last_line_ignored(self, data_file):
+        """末尾残行被忽略，之后追加的记录另起一行"""
+        service = UserStockService(data_file)
+        service.add_stock("favorites", "600519")
+        with open(service.log_file, "ab") as f:
+            f.write(b'{"op": "add", "g": "favorites", "c": "0000')
+
+        other = UserStockService(data_file)
+        assert other._read_data()["favorites"] == ["600519"]
+
+        assert other.add_stock("favorites", "000858")
+        data = UserStockService(data_file)._read_data()
+        assert data["favorites"] == ["600519", "000858"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
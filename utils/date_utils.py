@@ -3,7 +3,9 @@
 提供交易日判断、日期格式化等功能
 """
 
+import time
 from datetime import datetime, date, timedelta
+from functools import lru_cache
 from typing import Optional
 
 
@@ -14,6 +16,46 @@ AFTERNOON_START = "13:00"
 AFTERNOON_END = "15:00"
 
 
+def _to_minutes(hhmm: str) -> int:
+    """'HH:MM' 转为当天的分钟数"""
+    hour, minute = hhmm.split(':')
+    return int(hour) * 60 + int(minute)
+
+
+# 交易时段边界（当天分钟数，导入时计算一次）
+_MORNING_START = _to_minutes(MORNING_START)
+_MORNING_END = _to_minutes(MORNING_END)
+_AFTERNOON_START = _to_minutes(AFTERNOON_START)
+_AFTERNOON_END = _to_minutes(AFTERNOON_END)
+
+
+# 今天日期的缓存: [日期, 取得时的单调时钟读数]
+_TODAY_CACHE = [None, float('-inf')]
+_TODAY_TTL = 1.0
+
+
+def _today() -> date:
+    """今天的日期（缓存 1 秒，轮询时不必每次都取系统时间并换算时区）"""
+    now = time.monotonic()
+    if now - _TODAY_CACHE[1] >= _TODAY_TTL:
+        _TODAY_CACHE[0] = date.today()
+        _TODAY_CACHE[1] = now
+    return _TODAY_CACHE[0]
+
+
+@lru_cache(maxsize=512)
+def _is_trading_day_cached(ordinal: int) -> bool:
+    """按日期序数（date.toordinal()）判断是否交易日，结果缓存"""
+    # 序数 1 (0001-01-01) 为周一，周末不是交易日
+    return (ordinal + 6) % 7 < 5
+
+
+def _last_trading_ordinal(ordinal: int) -> int:
+    """不晚于给定序数的最近交易日序数（周六退 1 天、周日退 2 天）"""
+    weekday = (ordinal + 6) % 7
+    return ordinal - (weekday - 4) if weekday >= 5 else ordinal
+
+
 def is_trading_day(check_date: Optional[date] = None) -> bool:
     """
     判断指定日期是否为交易日（仅检查周末，不含节假日）
@@ -25,10 +67,9 @@ def is_trading_day(check_date: Optional[date] = None) -> bool:
         True - 交易日, False - 非交易日（周末）
     """
     if check_date is None:
-        check_date = date.today()
+        check_date = _today()
     
-    # 周末不是交易日
-    return check_date.weekday() < 5  # 0-4 是周一到周五
+    return _is_trading_day_cached(check_date.toordinal())
 
 
 def is_trading_time(check_time: Optional[datetime] = None) -> bool:
@@ -48,17 +89,12 @@ def is_trading_time(check_time: Optional[datetime] = None) -> bool:
     if not is_trading_day(check_time.date()):
         return False
     
-    current = check_time.strftime('%H:%M')
-    
-    # 上午交易时段
-    if MORNING_START <= current <= MORNING_END:
-        return True
-    
-    # 下午交易时段
-    if AFTERNOON_START <= current <= AFTERNOON_END:
-        return True
+    # 精确到分钟比较（与按 'HH:MM' 字符串比较一致，两端均包含）
+    current = check_time.hour * 60 + check_time.minute
     
-    return False
+    # 上午交易时段 / 下午交易时段
+    return (_MORNING_START <= current <= _MORNING_END
+            or _AFTERNOON_START <= current <= _AFTERNOON_END)
 
 
 def get_last_trading_day(from_date: Optional[date] = None) -> date:
@@ -76,17 +112,9 @@ def get_last_trading_day(from_date: Optional[date] = None) -> date:
         最近的交易日日期
     """
     if from_date is None:
-        from_date = date.today()
+        from_date = _today()
     
-    check_date = from_date
-    
-    # 最多往前找10天
-    for _ in range(10):
-        if is_trading_day(check_date):
-            return check_date
-        check_date -= timedelta(days=1)
-    
-    return check_date
+    return date.fromordinal(_last_trading_ordinal(from_date.toordinal()))
 
 
 def get_previous_trading_day(from_date: Optional[date] = None) -> date:
@@ -100,17 +128,9 @@ def get_previous_trading_day(from_date: Optional[date] = None) -> date:
         上一个交易日日期
     """
     if from_date is None:
-        from_date = date.today()
-    
-    check_date = from_date - timedelta(days=1)
-    
-    # 最多往前找10天
-    for _ in range(10):
-        if is_trading_day(check_date):
-            return check_date
-        check_date -= timedelta(days=1)
+        from_date = _today()
     
-    return check_date
+    return date.fromordinal(_last_trading_ordinal(from_date.toordinal() - 1))
 
 
 def format_date(d: date, fmt: str = '%Y-%m-%d') -> str:
@@ -0,0 +1,79 @@
+"""
+JSON 序列化工具函数
+优先使用 orjson（未安装时回退到标准库 json），统一以 UTF-8 字节收发
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_loads(data: Union[bytes, str]) -> Any:
+    """
+    解析 JSON 数据
+
+    Args:
+        data: JSON 字节串或字符串
+
+    Returns:
+        解析后的 Python 对象
+
+    Raises:
+        json.JSONDecodeError: 数据格式错误（orjson 的异常同为其子类）
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj: Any, indent: bool = False) -> bytes:
+    """
+    序列化为 UTF-8 编码的 JSON 字节串（中文不转义）
+
+    Args:
+        obj: 待序列化对象
+        indent: 是否以2空格缩进输出
+
+    Returns:
+        JSON 字节串
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode('utf-8')
+
+
+def atomic_write_bytes(path: Union[str, Path], data: bytes):
+    """
+    原子写入文件：先写临时文件再 os.replace 覆盖，进程中途退出不会留下半个文件
+
+    Args:
+        path: 目标文件路径
+        data: 文件内容
+    """
+    # 临时文件与目标同目录（保证 os.replace 不跨文件系统），文件名唯一避免并发写入冲突
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def read_json_file(path: Union[str, Path]) -> Any:
+    """一次性读取整个文件并解析 JSON"""
+    return json_loads(Path(path).read_bytes())
+
+
+def write_json_file(path: Union[str, Path], obj: Any, indent: bool = False):
+    """序列化为 JSON 并原子写入文件"""
+    atomic_write_bytes(path, json_dumps(obj, indent=indent))
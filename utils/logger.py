@@ -3,44 +3,82 @@
 使用 Python logging 模块，支持文件 + 控制台输出
 """
 
+import atexit
 import logging
 import os
+import queue
 import sys
-from datetime import datetime
+import threading
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 from pathlib import Path
+from typing import Optional
 
 # 导入配置
 try:
-    from settings import LOG_LEVEL, LOG_DIR, LOG_FORMAT, LOG_DATE_FORMAT
+    from settings import LOG_LEVEL, LOG_FILE, LOG_FORMAT, LOG_DEBUG_FORMAT, LOG_DATE_FORMAT
 except ImportError:
     LOG_LEVEL = "INFO"
-    LOG_DIR = Path(__file__).parent.parent / "logs"
+    LOG_FILE = str(Path(__file__).parent.parent / "logs" / "app.log")
     LOG_FORMAT = "%(asctime)s | %(levelname)-8s | %(name)s | %(message)s"
+    LOG_DEBUG_FORMAT = "%(asctime)s | %(levelname)-8s | %(name)s | %(funcName)s:%(lineno)d | %(message)s"
     LOG_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
-# 确保日志目录存在
-os.makedirs(LOG_DIR, exist_ok=True)
+# 日志格式不含线程/进程信息，不再为每条记录采集
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
 
-# 日志文件路径（按日期）
-LOG_FILE = LOG_DIR / f"app_{datetime.now().strftime('%Y%m%d')}.log"
+# 按天轮转时保留的历史日志数（app.log.YYYY-MM-DD）
+LOG_BACKUP_COUNT = 30
 
 # 创建根日志器
 _root_logger = logging.getLogger("Stock")
 _root_logger.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
 
-# 避免重复添加处理器
-if not _root_logger.handlers:
-    # 文件处理器
-    file_handler = logging.FileHandler(LOG_FILE, encoding='utf-8')
-    file_handler.setLevel(logging.DEBUG)
-    file_handler.setFormatter(logging.Formatter(LOG_FORMAT, LOG_DATE_FORMAT))
-    _root_logger.addHandler(file_handler)
-    
-    # 控制台处理器（只显示 INFO 及以上）
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(logging.Formatter(LOG_FORMAT, LOG_DATE_FORMAT))
-    _root_logger.addHandler(console_handler)
+_init_lock = threading.Lock()
+_initialized = False
+# 后台写日志的监听线程（调用方只需把记录放入队列，格式化和文件/控制台 I/O 在该线程完成）
+_listener: Optional[QueueListener] = None
+
+
+def _init_handlers():
+    """添加文件和控制台处理器（线程安全，只执行一次）"""
+    global _initialized, _listener
+    if _initialized:
+        return
+    with _init_lock:
+        if _initialized:
+            return
+        # 只看本日志器自身的处理器（hasHandlers 会把根日志器上的处理器也算进去）
+        if not _root_logger.handlers:
+            # 确保日志目录存在
+            os.makedirs(os.path.dirname(os.path.abspath(LOG_FILE)), exist_ok=True)
+            
+            # 非 DEBUG 级别的文件日志不输出函数名/行号
+            debug = _root_logger.isEnabledFor(logging.DEBUG)
+            
+            # 文件处理器（首次写入时才打开文件，每天零点轮转，长时间运行跨天也会切换文件）
+            file_handler = TimedRotatingFileHandler(
+                LOG_FILE, when='midnight', backupCount=LOG_BACKUP_COUNT,
+                encoding='utf-8', delay=True
+            )
+            file_handler.setLevel(logging.DEBUG)
+            file_handler.setFormatter(logging.Formatter(LOG_DEBUG_FORMAT if debug else LOG_FORMAT, LOG_DATE_FORMAT))
+            
+            # 控制台处理器（只显示 INFO 及以上）
+            console_handler = logging.StreamHandler(sys.stdout)
+            console_handler.setLevel(logging.INFO)
+            console_handler.setFormatter(logging.Formatter(LOG_FORMAT, LOG_DATE_FORMAT))
+            
+            log_queue = queue.SimpleQueue()
+            _root_logger.addHandler(QueueHandler(log_queue))
+            _listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+            _listener.start()
+            atexit.register(_listener.stop)  # 退出前写完队列中剩余的日志
+        _initialized = True
+
+
+_init_handlers()
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -53,6 +91,7 @@ def get_logger(name: str) -> logging.Logger:
         logger.info("消息")
         logger.error("错误", exc_info=True)
     """
+    _init_handlers()
     return logging.getLogger(f"Stock.{name}")
 
 
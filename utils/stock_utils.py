@@ -3,9 +3,55 @@
 提供股票代码格式化、验证、市场类型判断等功能
 """
 
-from typing import Optional
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
 
+import numpy as np
+import pandas as pd
 
+
+# 代码开头的市场前缀 -> 市场（各工具函数共用，一次字典查找代替逐个比较/替换）
+_PREFIX_MAP = {
+    "sh": "sh", "sz": "sz", "bj": "bj", "zz": "zz",
+    "SH": "sh", "SZ": "sz", "BJ": "bj",
+    "hk": "hk", "HK": "hk",
+}
+_CN_MARKETS = frozenset(("sh", "sz", "bj"))
+_HK_MARKETS = frozenset(("hk",))
+# get_stock_type 原样返回的前缀（zz 仅用于判断类型，格式化/校验时不去除）
+_TYPE_MARKETS = _CN_MARKETS | {"zz"}
+
+# quotes_to_dataframe 输出的列
+QUOTE_COLUMNS = ('code', 'name', 'now', 'close', 'open', 'high', 'low', 'volume')
+
+# A股指数代码: 市场前缀 + 指数代码开头
+_INDEX_MARKETS = frozenset(("sh", "sz"))
+_INDEX_HEADS = frozenset(("000", "399"))
+
+# 代码开头 -> 市场，按 3 位、2 位、1 位依次查表（各表之间无重叠前缀，与原判断顺序等价）
+_PREFIX3 = {"110": "sh", "113": "sh", "118": "sh", "132": "sh", "204": "sh"}
+_PREFIX2 = {"43": "bj", "83": "bj", "87": "bj", "92": "bj"}
+_PREFIX1 = {"5": "sh", "6": "sh", "7": "sh", "9": "sh"}
+
+
+def _strip_prefix(code: str, markets: FrozenSet[str] = _CN_MARKETS) -> Tuple[Optional[str], str]:
+    """
+    拆分代码开头的市场前缀
+    
+    Args:
+        code: 股票代码，如 'sh600519'、'SZ000001'、'600519'
+        markets: 视为前缀的市场，默认A股市场
+    
+    Returns:
+        (市场, 去掉前缀的代码)；没有前缀时为 (None, 原代码)
+    """
+    market = _PREFIX_MAP.get(code[:2])
+    if market in markets:
+        return market, code[2:]
+    return None, code
+
+
+@lru_cache(maxsize=8192)
 def get_stock_type(code: str) -> str:
     """
     根据股票代码判断市场类型
@@ -15,6 +61,8 @@ def get_stock_type(code: str) -> str:
     - ['5', '6', '7', '9', '110', '113', '118', '132', '204'] 开头为 sh (上交所)
     - 其余为 sz (深交所)
     
+    结果按代码缓存（纯函数，行情轮询时同一批代码会被反复判断）
+    
     Args:
         code: 股票代码，如 '600519' 或 'sh600519'
     
@@ -26,29 +74,46 @@ def get_stock_type(code: str) -> str:
     if not code:
         return 'sz'
     
-    assert isinstance(code, str), "stock code need str type"
-    
     # 如果已有前缀直接返回
-    if code.startswith(("sh", "sz", "zz", "bj")):
-        return code[:2]
+    market, _ = _strip_prefix(code, _TYPE_MARKETS)
+    if market:
+        return market
+    
+    # 查表，未命中默认深交所
+    return _PREFIX3.get(code[:3]) or _PREFIX2.get(code[:2]) or _PREFIX1.get(code[:1], "sz")
+
+
+def get_stock_type_batch(codes: Iterable[str]) -> np.ndarray:
+    """
+    批量判断市场类型（get_stock_type 的向量化版本，规则相同）
     
-    # 北交所
-    bj_head = ("43", "83", "87", "92")
-    if code.startswith(bj_head):
-        return "bj"
+    截取前 1/2/3 位后按前缀表整体匹配，按优先级从低到高依次覆盖
     
-    # 上交所
-    sh_head = ("5", "6", "7", "9", "110", "113", "118", "132", "204")
-    if code.startswith(sh_head):
-        return "sh"
+    Args:
+        codes: 股票代码序列或数组
     
-    # 默认深交所
-    return "sz"
+    Returns:
+        与输入等长的 '<U2' 数组，元素为 'sh' / 'sz' / 'bj'（或已带的前缀）
+    """
+    arr = np.asarray(codes, dtype=str)
+    out = np.full(arr.shape, 'sz', dtype='<U2')
+    
+    # 定长 unicode 数组 astype 更短的宽度即截取前 N 位
+    head2 = arr.astype('<U2')
+    out[np.isin(arr.astype('<U1'), list(_PREFIX1))] = 'sh'
+    out[np.isin(head2, list(_PREFIX2))] = 'bj'
+    out[np.isin(arr.astype('<U3'), list(_PREFIX3))] = 'sh'
+    
+    for prefix, market in _PREFIX_MAP.items():
+        if market in _TYPE_MARKETS:
+            out[head2 == prefix] = market
+    return out
 
 
+@lru_cache(maxsize=8192)
 def format_stock_code(code: str, with_prefix: bool = False) -> str:
     """
-    格式化股票代码
+    格式化股票代码（结果按参数缓存）
     
     Args:
         code: 原始股票代码（可能带前缀）
@@ -57,12 +122,8 @@ def format_stock_code(code: str, with_prefix: bool = False) -> str:
     Returns:
         格式化后的股票代码
     """
-    # 移除可能的前缀
-    clean_code = code.replace('sh', '').replace('sz', '').replace('bj', '')
-    clean_code = clean_code.replace('SH', '').replace('SZ', '').replace('BJ', '')
-    
-    # 补齐到6位
-    clean_code = clean_code.zfill(6)
+    # 移除可能的前缀并补齐到6位
+    clean_code = _strip_prefix(code)[1].zfill(6)
     
     if with_prefix:
         prefix = get_stock_type(clean_code)
@@ -85,16 +146,16 @@ def validate_stock_code(code: str) -> bool:
         return False
     
     # 移除前缀
-    clean = code.replace('sh', '').replace('sz', '').replace('bj', '')
-    clean = clean.replace('SH', '').replace('SZ', '').replace('BJ', '')
+    clean = _strip_prefix(code)[1]
     
     # 必须是6位数字
     return len(clean) == 6 and clean.isdigit()
 
 
+@lru_cache(maxsize=8192)
 def is_index_code(code: str) -> bool:
     """
-    判断是否为指数代码
+    判断是否为指数代码（结果按代码缓存）
     
     Args:
         code: 代码
@@ -102,20 +163,15 @@ def is_index_code(code: str) -> bool:
     Returns:
         True - 是指数, False - 不是指数
     """
-    if code.startswith('^'):  # 美股/港股指数
-        return True
-    if code.endswith('.HK'):  # 港股指数
-        return True
+    if not code:
+        return False
     
-    # A股指数 (带前缀格式)
-    if code.startswith('sh') or code.startswith('sz'):
-        pure = code[2:]
-        if pure.startswith('000') and len(pure) == 6:  # 上证指数
-            return True
-        if pure.startswith('399') and len(pure) == 6:  # 深证指数
-            return True
+    # 美股/港股指数 (^HSI) 或港股指数 (HSTECH.HK)
+    if code[0] == '^' or code.endswith('.HK'):
+        return True
     
-    return False
+    # A股指数 (带前缀格式): 上证 000xxx / 深证 399xxx
+    return len(code) == 8 and code[:2] in _INDEX_MARKETS and code[2:5] in _INDEX_HEADS
 
 
 def format_hk_code(code: str) -> str:
@@ -128,5 +184,29 @@ def format_hk_code(code: str) -> str:
     Returns:
         5位格式的港股代码
     """
-    clean = code.replace('hk', '').replace('HK', '')
-    return clean.zfill(5)
+    return _strip_prefix(code, _HK_MARKETS)[1].zfill(5)
+
+
+def quotes_to_dataframe(quotes: Dict[str, Dict]) -> pd.DataFrame:
+    """
+    将行情字典转为按列存储的 DataFrame，便于整列计算涨跌幅、筛选等
+    
+    Args:
+        quotes: 实时行情 {代码: {name, now, close, open, high, low, volume, ...}}
+    
+    Returns:
+        列为 QUOTE_COLUMNS 的 DataFrame，每只股票一行；缺失字段为 NaN
+    
+    Usage:
+        df = quotes_to_dataframe(service.get_realtime(codes))
+        df['change_pct'] = (df['now'] - df['close']) / df['close'] * 100
+    """
+    rows = quotes.values()
+    data = {'code': list(quotes)}
+    for col in QUOTE_COLUMNS[1:]:
+        data[col] = [quote.get(col) for quote in rows]
+    
+    df = pd.DataFrame(data, columns=QUOTE_COLUMNS)
+    numeric = list(QUOTE_COLUMNS[2:])
+    df[numeric] = df[numeric].apply(pd.to_numeric, errors='coerce')
+    return df